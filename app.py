@@ -1,32 +1,150 @@
 import os
+import re
+import bisect
+import shutil
+import difflib
+import math
+import hashlib
+import itertools
+import queue
+import sqlite3
 import subprocess
 import sys      
+import threading
 import time
 import traceback
+import wave
+import zlib
+import urllib.parse
+import urllib.request
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from collections import OrderedDict, deque
 from pathlib import Path
-from vosk import Model, KaldiRecognizer
-import pyaudio
+import importlib
 import json
 from dotenv import load_dotenv
 
+PROCESS_START = time.perf_counter()
+
+# Lazy Loading
+class Subsystems:
+    """
+    Heavy dependencies created on first use (or warmed up in the background)
+    instead of at import time. Records how long each one took to initialise.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._values = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.timings = OrderedDict()
+
+    def register(self, name, factory):
+        self._factories[name] = factory
+
+    def record(self, name, seconds):
+        self.timings[name] = (seconds, threading.current_thread().name)
+
+    def is_ready(self, name):
+        return name in self._values
+
+    def get(self, name):
+        if name in self._values:
+            return self._values[name]
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._values:
+                started = time.perf_counter()
+                value = self._factories[name]()
+                self.record(name, time.perf_counter() - started)
+                self._values[name] = value
+        return self._values[name]
+
+    def import_module(self, module_name):
+        name = f"import {module_name}"
+        if name not in self._factories:
+            self.register(name, lambda: importlib.import_module(module_name))
+        return self.get(name)
+
+    def warm_up(self, names, on_done=None, on_task_done=None):
+        """
+        Initialises subsystems on background threads. on_task_done(name, ok) runs after
+        each one, on_done once all have finished.
+        """
+        remaining = [len(names)]
+        remaining_lock = threading.Lock()
+
+        def worker(name):
+            ok = True
+            try:
+                self.get(name)
+            except Exception as e:
+                ok = False
+                print(f"Failed to initialise {name}: {e}")
+            if on_task_done:
+                on_task_done(name, ok)
+            with remaining_lock:
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished and on_done:
+                on_done()
+
+        for name in names:
+            threading.Thread(target=worker, args=(name,), name=f"anton-init-{name}", daemon=True).start()
+
+    def report(self) -> str:
+        lines = ["Startup timings:"]
+        for name, (seconds, thread_name) in sorted(self.timings.items(), key=lambda item: -item[1][0]):
+            lines.append(f"  {name:<32} {seconds * 1000:8.1f} ms  ({thread_name})")
+        return "\n".join(lines)
+
+anton_subsystems = Subsystems()
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, module_name):
+        self._module_name = module_name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = anton_subsystems.import_module(self._module_name)
+        return getattr(self._module, attr)
+
+vosk = LazyModule("vosk")
+pyaudio = LazyModule("pyaudio")
+
 
 FILES_DIR = "Anton_Files"
 os.makedirs(FILES_DIR, exist_ok=True)
+CACHE_DIR = ".anton_cache"
+VERSIONS_DIR = ".anton_versions"
+HISTORY_PATH = os.path.join(".anton_history", "conversation.jsonl")
 
 # PySide6 imports
 from PySide6.QtCore import (QSize, Qt, QPropertyAnimation, QEasingCurve, 
                           QParallelAnimationGroup, QSequentialAnimationGroup, 
-                          QTimer, Signal, Property, QObject, QThread, Slot)
+                          QTimer, Signal, Property, QObject, QThread, Slot,
+                          QAbstractListModel, QModelIndex, QRectF, QPointF,
+                          QFileSystemWatcher, QThreadPool, QRunnable)
 from PySide6.QtGui import (QFont, QColor, QPalette, QPixmap, QIcon, 
                          QFontDatabase, QAction, QLinearGradient, QPainter, 
-                         QBrush, QPen, QPainterPath)
+                         QBrush, QPen, QPainterPath, QKeySequence, QShortcut,
+                         QStaticText, QTextOption, QFontMetrics, QGuiApplication,
+                         QTransform)
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QLabel, QTextEdit, 
-                             QLineEdit, QScrollArea, QFrame, QStackedWidget,
+                             QLineEdit, QFrame, QStackedWidget,
                              QListWidget, QListWidgetItem, QSplitter, 
                              QFileDialog, QMenu, QDialog, QComboBox, 
-                             QProgressBar, QGraphicsOpacityEffect, QSizePolicy,
-                             QToolButton)
+                             QProgressBar, QSizePolicy,
+                             QToolButton, QListView, QStyledItemDelegate, QStyle,
+                             QAbstractItemView)
 
 # Import Anton's existing functionality
 load_dotenv()
@@ -35,43 +153,585 @@ load_dotenv()
 AiKey = os.getenv("GEMINI_API_KEY")
 SearchId = os.getenv("SEARCH_ENGINE_ID")
 SearchKey = os.getenv("CUSTOM_SEARCH_KEY")
+RouterThreshold = float(os.getenv("ANTON_ROUTER_THRESHOLD", "0.75"))
+StreamResponses = os.getenv("ANTON_STREAM_RESPONSES", "1") == "1"
+ResponseCacheSize = int(os.getenv("ANTON_RESPONSE_CACHE_SIZE", "500"))
+ResponseCacheTTL = float(os.getenv("ANTON_RESPONSE_CACHE_TTL", "1800"))
+SearchCacheTTL = float(os.getenv("ANTON_SEARCH_CACHE_TTL", "600"))
+SearchEndpoint = os.getenv("ANTON_SEARCH_ENDPOINT")
+SearchBackendUrl = os.getenv("ANTON_SEARCH_BACKEND_URL")
+SpeculativeExecution = os.getenv("ANTON_SPECULATIVE", "0") == "1"
+SpeechLanguage = os.getenv("ANTON_STT_LANGUAGE", "en")
+VoiceMode = os.getenv("ANTON_VOICE_MODE", "push_to_talk")
+HistoryRestoreCount = int(os.getenv("ANTON_HISTORY_RESTORE", "50"))
+HistoryPageSize = int(os.getenv("ANTON_HISTORY_PAGE", "50"))
+MaxConcurrentRequests = int(os.getenv("ANTON_MAX_REQUESTS", "3"))
+MaxPendingRequests = int(os.getenv("ANTON_MAX_PENDING", "8"))
+ContextTokenBudget = int(os.getenv("ANTON_CONTEXT_TOKENS", "1500"))
+ContextRecentTurns = int(os.getenv("ANTON_CONTEXT_TURNS", "4"))
+FileIndexMaxBytes = int(os.getenv("ANTON_INDEX_MAX_BYTES", str(5 * 1024 * 1024)))
+SummaryChunkChars = int(os.getenv("ANTON_SUMMARY_CHUNK_CHARS", "12000"))
+SummaryWorkers = int(os.getenv("ANTON_SUMMARY_WORKERS", "4"))
+SummaryCacheSize = int(os.getenv("ANTON_SUMMARY_CACHE_SIZE", "5000"))
+LocalDiffMaxLines = int(os.getenv("ANTON_LOCAL_DIFF_LINES", "8"))
+DiffMaxBytes = int(os.getenv("ANTON_DIFF_MAX_BYTES", str(4 * 1024 * 1024)))
+VersionChainLength = int(os.getenv("ANTON_VERSION_CHAIN", "32"))
+BatchWorkers = int(os.getenv("ANTON_BATCH_WORKERS", "4"))
 
-# Google AI & Search
-import google.generativeai as genai
-from googleapiclient.discovery import build
+# Gemini model per task; ANTON_MODEL sets the default for every task
+DefaultModelName = os.getenv("ANTON_MODEL", "gemini-2.0-flash-thinking-exp")
+TaskModelNames = {
+    "routing": os.getenv("ANTON_MODEL_ROUTING", DefaultModelName),
+    "answering": os.getenv("ANTON_MODEL_ANSWERING", DefaultModelName),
+    "summarising": os.getenv("ANTON_MODEL_SUMMARISING", DefaultModelName),
+    "writing": os.getenv("ANTON_MODEL_WRITING", DefaultModelName),
+}
+
+# Model backend: "gemini", or "stub" for a deterministic offline model with simulated latency
+ModelBackend = os.getenv("ANTON_BACKEND", "gemini")
+StubLatency = float(os.getenv("ANTON_STUB_LATENCY_MS", "300")) / 1000
+StubChunkLatency = float(os.getenv("ANTON_STUB_CHUNK_MS", "30")) / 1000
+
+# Calls allowed in flight at once per external provider
+ProviderConcurrency = {
+    "gemini": int(os.getenv("ANTON_GEMINI_CONCURRENCY", "4")),
+    "search": int(os.getenv("ANTON_SEARCH_CONCURRENCY", "2")),
+}
+
+# Google AI & Search (imported on first use)
+genai = LazyModule("google.generativeai")
 
 # TTS & STT
-import pyttsx3
-import speech_recognition as sr
+pyttsx3 = LazyModule("pyttsx3")
+sr = LazyModule("speech_recognition")
+
+class ProviderLimits:
+    """Caps concurrent calls to each external provider across every thread in the app."""
+
+    def __init__(self, limits):
+        self._semaphores = {name: threading.BoundedSemaphore(max(1, limit)) for name, limit in limits.items()}
+        self.stats = {name: {"calls": 0, "waited": 0, "wait_seconds": 0.0} for name in limits}
+
+    @contextmanager
+    def slot(self, provider):
+        semaphore = self._semaphores.get(provider)
+        if semaphore is None:
+            yield
+            return
+        entry = self.stats[provider]
+        entry["calls"] += 1
+        if not semaphore.acquire(blocking=False):
+            started = time.perf_counter()
+            semaphore.acquire()
+            entry["waited"] += 1
+            entry["wait_seconds"] += time.perf_counter() - started
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    def report(self) -> str:
+        return "Provider limits: " + ", ".join(
+            f"{name} {entry['calls']} calls ({entry['waited']} queued, {entry['wait_seconds']:.2f}s waiting)"
+            for name, entry in self.stats.items()
+        )
+
+anton_limits = ProviderLimits(ProviderConcurrency)
+
+# Model Backends
+class GeminiBackend:
+    """
+    Google Gemini through google.generativeai. genai.configure sets up a single
+    client, so every model created here reuses the same transport.
+    """
+    name = "gemini"
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self._models = {}
+        self._configured = False
+        self._lock = threading.Lock()
+
+    def model(self, model_name):
+        """Returns the shared GenerativeModel for a model name."""
+        with self._lock:
+            if not self._configured:
+                genai.configure(api_key=self.api_key)
+                self._configured = True
+            if model_name not in self._models:
+                self._models[model_name] = genai.GenerativeModel(model_name)
+            return self._models[model_name]
+
+    def generate(self, model_name, task, prompt, stream=False):
+        return self.model(model_name).generate_content(prompt, stream=stream)
+
+class StubResponse:
+    """A response or streamed chunk with the same .text attribute as Gemini's."""
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+STUB_WORDS = ("answer", "river", "quickly", "bright", "system", "garden", "seven", "careful",
+              "signal", "market", "gentle", "orbit", "paper", "useful", "winter", "simple")
+
+class StubBackend:
+    """
+    Deterministic offline stand-in for Gemini. The reply is derived from a hash of
+    the prompt, arrives after `latency` seconds and, when streamed, comes in `chunks`
+    pieces `chunk_latency` apart. Lets Anton run without network and makes its own
+    overhead measurable.
+    """
+    name = "stub"
+
+    def __init__(self, latency=StubLatency, chunk_latency=StubChunkLatency, chunks=4):
+        self.latency = latency
+        self.chunk_latency = chunk_latency
+        self.chunks = max(1, chunks)
+
+    def model(self, model_name):
+        return model_name
+
+    @staticmethod
+    def reply(task, prompt):
+        digest = hashlib.sha256(prompt.encode("utf-8", errors="surrogatepass")).digest()
+        if task == "routing":
+            return "yes" if digest[0] % 2 else "no"
+        sentences = []
+        for start in range(0, 24, 8):
+            words = [STUB_WORDS[byte % len(STUB_WORDS)] for byte in digest[start:start + 8]]
+            sentences.append(" ".join(words).capitalize() + ".")
+        return " ".join(sentences)
+
+    def generate(self, model_name, task, prompt, stream=False):
+        text = self.reply(task, prompt)
+        if stream:
+            return self._stream(text)
+        time.sleep(self.latency)
+        return StubResponse(text)
+
+    def _stream(self, text):
+        time.sleep(self.latency)
+        size = math.ceil(len(text) / self.chunks)
+        for i in range(0, len(text), size):
+            if i:
+                time.sleep(self.chunk_latency)
+            yield StubResponse(text[i:i + size])
+
+def create_backend(name=ModelBackend):
+    if name == "stub":
+        return StubBackend()
+    if name != "gemini":
+        print(f"Unknown ANTON_BACKEND '{name}', using Gemini")
+    return GeminiBackend(AiKey)
+
+class ModelRegistry:
+    """
+    Routes each task to its model on the configured backend (Gemini or the local stub).
+    Applies the Gemini concurrency limit and tracks call counts and latency per model.
+    """
+
+    def __init__(self, backend, task_models):
+        self.backend = backend
+        self.task_models = dict(task_models)
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def model_name(self, task):
+        return self.task_models.get(task, DefaultModelName)
 
-# Configure Gemini
-genai.configure(api_key=AiKey)
-model = genai.GenerativeModel('gemini-2.0-flash-thinking-exp')
-chat = model.start_chat(history=[])
+    def get(self, task="answering"):
+        """Returns the backend's shared model for a task."""
+        name = self.model_name(task)
+        model = self.backend.model(name)
+        with self._lock:
+            self.stats.setdefault(name, {"calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        return model
+
+    def _record(self, name, seconds, failed=False):
+        with self._lock:
+            entry = self.stats[name]
+            entry["calls"] += 1
+            entry["errors"] += int(failed)
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+    def generate(self, task, prompt, stream=False):
+        """
+        Generates with the task's model, within the Gemini concurrency limit.
+        Streamed responses start on first iteration and hold their slot until the last chunk.
+        """
+        self.get(task)
+        name = self.model_name(task)
+        if stream:
+            return self._timed_stream(task, name, prompt)
+        with anton_limits.slot("gemini"):
+            start = time.perf_counter()
+            try:
+                response = self.backend.generate(name, task, prompt)
+            except Exception:
+                self._record(name, time.perf_counter() - start, failed=True)
+                raise
+            self._record(name, time.perf_counter() - start)
+            return response
+
+    def _timed_stream(self, task, name, prompt):
+        with anton_limits.slot("gemini"):
+            start = time.perf_counter()
+            failed = True
+            try:
+                for chunk in self.backend.generate(name, task, prompt, stream=True):
+                    yield chunk
+                failed = False
+            finally:
+                self._record(name, time.perf_counter() - start, failed=failed)
+
+    def report(self) -> str:
+        lines = []
+        with self._lock:
+            for name, entry in self.stats.items():
+                calls = entry["calls"] or 1
+                lines.append(
+                    f"{self.backend.name}/{name}: {entry['calls']} calls, {entry['errors']} errors, "
+                    f"avg {entry['total_seconds'] / calls:.2f}s, max {entry['max_seconds']:.2f}s"
+                )
+        return "\n".join(lines) or "No model calls yet."
+
+anton_models = ModelRegistry(create_backend(), TaskModelNames)
+anton_subsystems.register("gemini", lambda: anton_models.get("answering"))
 
 # Text-to-Speech
-engine = pyttsx3.init()
+anton_subsystems.register("tts", lambda: pyttsx3.init())
+
+def get_engine():
+    return anton_subsystems.get("tts")
 
 def speak(text):
+    engine = get_engine()
     engine.say(text)
     engine.runAndWait()
-recognizer = sr.Recognizer()
 
-def recognize_speech():
+class SentenceBuffer:
+    """Collects streamed text and hands back each sentence once it is complete."""
+    BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text):
+        self._buffer += text
+        parts = self.BOUNDARY.split(self._buffer)
+        self._buffer = parts.pop()
+        return [part.strip() for part in parts if part.strip()]
+
+    def flush(self):
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+def split_sentences(text):
+    buffer = SentenceBuffer()
+    return buffer.feed(text) + buffer.flush()
+
+WELCOME_MESSAGE = "Hello! I'm Anton, your AI assistant. How can I help you today?"
+NOT_UNDERSTOOD_MESSAGE = "Sorry, I couldn't understand that."
+
+def fixed_phrases():
+    """Replies Anton speaks verbatim, pre-rendered to audio at startup."""
+    return [
+        Anton_Identity_Response(),
+        "I am Anton, your AI assistant. How can I help you today?",
+        "Hmm, I couldn't process that file command. Try rephrasing?",
+    ]
+
+class TTSAudioCache:
+    """
+    Synthesised WAV files keyed by text, voice and rate. Must be used from the
+    thread that owns the pyttsx3 engine (TTSWorker).
+    """
+
+    def __init__(self, directory=os.path.join(CACHE_DIR, "tts"), repeat_threshold=2):
+        self.directory = directory
+        self.repeat_threshold = repeat_threshold
+        self._seen = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, text):
+        voice = get_engine().getProperty('voice')
+        rate = get_engine().getProperty('rate')
+        digest = hashlib.sha256(f"{voice}|{rate}|{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.wav")
+
+    def get(self, text):
+        path = self.path_for(text)
+        return path if os.path.exists(path) else None
+
+    def should_render(self, text):
+        """Counts live-spoken sentences; repeated ones are worth rendering."""
+        count = self._seen.get(text, 0) + 1
+        self._seen[text] = count
+        return count == self.repeat_threshold
+
+    def render(self, text):
+        path = self.path_for(text)
+        if os.path.exists(path):
+            return path
+        temp_path = f"{path}.{os.getpid()}.tmp.wav"
+        get_engine().save_to_file(text, temp_path)
+        get_engine().runAndWait()
+        if os.path.exists(temp_path) and os.path.getsize(temp_path) > 0:
+            os.replace(temp_path, path)
+            return path
+        return None
+
+def play_wav(path, interrupt=None, frames_per_buffer=2048):
+    """Plays a WAV file through PyAudio; stops early once interrupt is set."""
+    with wave.open(path, "rb") as wav:
+        stream = get_pyaudio().open(format=get_pyaudio().get_format_from_width(wav.getsampwidth()),
+                                    channels=wav.getnchannels(), rate=wav.getframerate(), output=True)
+        try:
+            data = wav.readframes(frames_per_buffer)
+            while data and not (interrupt and interrupt.is_set()):
+                stream.write(data)
+                data = wav.readframes(frames_per_buffer)
+        finally:
+            stream.stop_stream()
+            stream.close()
+
+class TTSWorker(QThread):
+    """
+    Speaks queued sentences on its own thread, so runAndWait never blocks the Qt event loop.
+    cancel() drops everything queued and cuts off the current sentence (e.g. when a new
+    query arrives); skip() only cuts off the current sentence. Speech tagged with a
+    request id older than the one passed to cancel(before=...) is dropped as it arrives,
+    so an earlier answer that is still streaming stays silent.
+    Sentences with a cached rendering are played straight from the audio cache.
+    Renders wait in their own low-priority queue and only run while no speech is pending.
+    """
+    speaking = Signal(bool)
+    ready = Signal(bool)
+
+    def __init__(self, audio_cache=None, parent=None):
+        super().__init__(parent)
+        self._queue = queue.Queue()
+        self._renders = deque()
+        self._generation = 0
+        self._cutoff = 0
+        self._interrupt = threading.Event()
+        self._lock = threading.Lock()
+        self._is_speaking = False
+        self._rendering = False
+        self.audio_cache = audio_cache or TTSAudioCache()
+
+    def say(self, text, request_id=None):
+        """Queues text for speaking, one sentence at a time."""
+        with self._lock:
+            if request_id is not None and request_id < self._cutoff:
+                return
+            generation = self._generation
+        for sentence in split_sentences(text):
+            self._queue.put((generation, sentence))
+
+    def prewarm(self, phrases):
+        """Renders phrases to the audio cache in the background."""
+        for phrase in phrases:
+            self._renders.extend(split_sentences(phrase))
+
+    def cancel(self, before=None):
+        with self._lock:
+            self._generation += 1
+            if before is not None:
+                self._cutoff = max(self._cutoff, before)
+        try:
+            while True:
+                if self._queue.get_nowait() is None:
+                    self._queue.put(None)  # keep a pending stop()
+                    break
+        except queue.Empty:
+            pass
+        self._interrupt.set()
+
+    def skip(self):
+        self._interrupt.set()
+
+    def stop(self):
+        self.cancel()
+        self._queue.put(None)
+        self.wait(2000)
+
+    def _on_word(self, name, location, length):
+        # Runs on this thread inside runAndWait, the only safe place to stop the engine
+        if self._interrupt.is_set() and not self._rendering:
+            get_engine().stop()
+
+    def _render(self, sentence):
+        self._rendering = True
+        try:
+            self.audio_cache.render(sentence)
+        except Exception as e:
+            print(f"Error caching speech for '{sentence[:30]}': {e}")
+        finally:
+            self._rendering = False
+
+    def _set_speaking(self, is_speaking):
+        if is_speaking != self._is_speaking:
+            self._is_speaking = is_speaking
+            self.speaking.emit(is_speaking)
+
+    def run(self):
+        # The engine is created here, off the GUI thread, and only used from this thread
+        try:
+            get_engine().connect('started-word', self._on_word)
+        except Exception as e:
+            print(f"Text-to-speech unavailable: {e}")
+            self.ready.emit(False)
+            return
+        self.ready.emit(True)
+        while True:
+            try:
+                # Renders only get the thread while nothing is waiting to be spoken
+                item = self._queue.get(block=not self._renders, timeout=0.3)
+            except queue.Empty:
+                self._set_speaking(False)
+                if self._renders:
+                    self._render(self._renders.popleft())
+                continue
+            if item is None:
+                break
+            generation, sentence = item
+            with self._lock:
+                if generation != self._generation:
+                    continue
+            self._interrupt.clear()
+            self._set_speaking(True)
+            try:
+                cached = self.audio_cache.get(sentence)
+                if cached:
+                    play_wav(cached, self._interrupt)
+                else:
+                    speak(sentence)
+                    if self.audio_cache.should_render(sentence):
+                        self._renders.append(sentence)
+            except Exception as e:
+                print(f"Error speaking text: {e}")
+            if self._queue.empty():
+                self._set_speaking(False)
+        self._set_speaking(False)
+
+anton_subsystems.register("speech_recognition", lambda: sr.Recognizer())
+
+# Offline Speech-to-Text (Vosk)
+VOSK_MODELS = {
+    "en": os.path.join("models", "vosk-model-small-en-us-0.15"),
+    "hi": os.path.join("models", "vosk-model-small-hi-0.22"),
+}
+SAMPLE_RATE = 16000
+FRAMES_PER_BUFFER = 4000  # 250ms of 16kHz audio
+MAX_UTTERANCE_SECONDS = 15
+
+_vosk_models = {}
+_vosk_lock = threading.Lock()
+_pyaudio = None
+
+def load_vosk_model(language=SpeechLanguage):
+    """Loads a bundled Vosk model once and shares it between recognizers."""
+    path = VOSK_MODELS.get(language, language)
+    with _vosk_lock:
+        if path not in _vosk_models:
+            if not os.path.isdir(path):
+                raise FileNotFoundError(f"Vosk model not found at '{path}'")
+            started = time.perf_counter()
+            _vosk_models[path] = vosk.Model(path)
+            anton_subsystems.record(f"vosk model ({language})", time.perf_counter() - started)
+        return _vosk_models[path]
+
+def get_pyaudio():
+    global _pyaudio
+    with _vosk_lock:
+        if _pyaudio is None:
+            started = time.perf_counter()
+            _pyaudio = pyaudio.PyAudio()
+            anton_subsystems.record("pyaudio", time.perf_counter() - started)
+    return _pyaudio
+
+class VoskStreamingRecognizer:
+    """
+    Streaming offline recognizer over 16-bit mono PCM.
+    on_partial receives the running hypothesis while the user speaks;
+    on_final receives the text once Vosk detects the end of an utterance.
+    Audio is pushed in block by block (feed/finish), by the AudioWorker's microphone
+    stream or from WAV files (transcribe_wav).
+    """
+
+    def __init__(self, language=SpeechLanguage, sample_rate=SAMPLE_RATE, on_partial=None, on_final=None):
+        self.model = load_vosk_model(language)
+        self.sample_rate = sample_rate
+        self.on_partial = on_partial
+        self.on_final = on_final
+        self.recognizer = vosk.KaldiRecognizer(self.model, sample_rate)
+        self._last_partial = ""
+
+    def reset(self):
+        self.recognizer.Reset()
+        self._last_partial = ""
+
+    def feed(self, data):
+        """Feeds one block of PCM; returns the final text when an utterance ends, else None."""
+        if self.recognizer.AcceptWaveform(data):
+            return self._emit_final(json.loads(self.recognizer.Result()).get("text", ""))
+        partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        if partial and partial != self._last_partial:
+            self._last_partial = partial
+            if self.on_partial:
+                self.on_partial(partial)
+        return None
+
+    def finish(self):
+        """Flushes whatever audio is buffered and returns its final text."""
+        return self._emit_final(json.loads(self.recognizer.FinalResult()).get("text", ""))
+
+    def _emit_final(self, text):
+        self._last_partial = ""
+        text = text.strip()
+        if text and self.on_final:
+            self.on_final(text)
+        return text
+
+    def transcribe_wav(self, path, frames_per_buffer=FRAMES_PER_BUFFER):
+        """Runs a mono 16-bit WAV file through the recognizer; returns every final result."""
+        with wave.open(path, "rb") as wav:
+            if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+                raise ValueError(f"'{path}' must be mono 16-bit PCM")
+            if wav.getframerate() != self.sample_rate:
+                self.sample_rate = wav.getframerate()
+                self.recognizer = vosk.KaldiRecognizer(self.model, self.sample_rate)
+            self.reset()
+            results = []
+            while True:
+                data = wav.readframes(frames_per_buffer)
+                if not data:
+                    break
+                text = self.feed(data)
+                if text:
+                    results.append(text)
+            text = self.finish()
+            if text:
+                results.append(text)
+            return results
+
+def recognize_speech_online():
+    recognizer = anton_subsystems.get("speech_recognition")
     with sr.Microphone() as source:
         print("Listening...")
         audio = recognizer.listen(source)
     try:
         return recognizer.recognize_google(audio)
     except sr.UnknownValueError:
-        return "Sorry, I couldn't understand that."
+        return NOT_UNDERSTOOD_MESSAGE
     except sr.RequestError:
         return "Speech recognition service unavailable."
 
 # Search Handling
-def Anton_Search(query, num_results=7):
-    service = build("customsearch", "v1", developerKey=SearchKey)
-    results = service.cse().list(q=query, cx=SearchId, num=num_results).execute()
+def parse_search_items(results):
     search_results = []
     if "items" in results:
         for item in results["items"]:
@@ -82,8 +742,144 @@ def Anton_Search(query, num_results=7):
             })
     return search_results
 
+class SearchBackend(ABC):
+    """Interface for web search providers; search() returns a list of title/link/snippet dicts."""
+
+    @abstractmethod
+    def search(self, query, num_results):
+        pass
+
+class CustomSearchBackend(SearchBackend):
+    """
+    Google Custom Search. The discovery client is built once and reused; each thread
+    gets its own HTTP connection because httplib2 connections are not thread-safe.
+    api_endpoint can point the client at a local fake server.
+    """
+
+    def __init__(self, api_key, engine_id, api_endpoint=None):
+        self.api_key = api_key
+        self.engine_id = engine_id
+        self.api_endpoint = api_endpoint
+        self._service = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def service(self):
+        with self._lock:
+            if self._service is None:
+                from googleapiclient.discovery import build
+                client_options = {"api_endpoint": self.api_endpoint} if self.api_endpoint else None
+                self._service = build("customsearch", "v1", developerKey=self.api_key,
+                                      client_options=client_options)
+            return self._service
+
+    def _http(self):
+        if not hasattr(self._local, "http"):
+            import httplib2
+            self._local.http = httplib2.Http()
+        return self._local.http
+
+    def search(self, query, num_results):
+        request = self.service.cse().list(q=query, cx=self.engine_id, num=num_results)
+        return parse_search_items(request.execute(http=self._http()))
+
+class HttpSearchBackend(SearchBackend):
+    """Plain HTTP backend expecting Custom Search style JSON from GET <url>?q=...&num=..."""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def search(self, query, num_results):
+        params = urllib.parse.urlencode({"q": query, "num": num_results})
+        with urllib.request.urlopen(f"{self.url}?{params}", timeout=self.timeout) as response:
+            return parse_search_items(json.loads(response.read().decode("utf-8")))
+
+class CachedSearch:
+    """
+    TTL cache in front of a SearchBackend. Identical queries that arrive while a
+    request is already in flight wait for that request instead of sending their own.
+    """
+
+    def __init__(self, backend, ttl=SearchCacheTTL, max_entries=256):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    def search(self, query, num_results=7):
+        key = (normalize_query(query), num_results)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return list(entry[1])
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = Future()
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not owner:
+            return list(pending.result())
+
+        try:
+            with anton_limits.slot("search"):
+                results = self.backend.search(query, num_results)
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set_exception(e)
+            raise
+
+        with self._lock:
+            self._cache[key] = (time.monotonic(), results)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            self._inflight.pop(key, None)
+        pending.set_result(results)
+        return list(results)
+
+    def report(self) -> str:
+        return (
+            f"Search cache: {self.stats['hits']} hits, {self.stats['misses']} backend requests, "
+            f"{self.stats['coalesced']} coalesced"
+        )
+
+class StubSearchBackend(SearchBackend):
+    """Offline search for the stub model backend: fixed results after a simulated delay."""
+
+    def __init__(self, latency=StubLatency):
+        self.latency = latency
+
+    def search(self, query, num_results):
+        time.sleep(self.latency)
+        return [
+            {"title": f"Result {i} for {query}", "link": f"https://example.com/{i}",
+             "snippet": StubBackend.reply("answering", f"{query}:{i}")}
+            for i in range(1, num_results + 1)
+        ]
+
+if SearchBackendUrl:
+    anton_search = CachedSearch(HttpSearchBackend(SearchBackendUrl))
+elif ModelBackend == "stub":
+    anton_search = CachedSearch(StubSearchBackend())
+else:
+    anton_search = CachedSearch(CustomSearchBackend(SearchKey, SearchId, SearchEndpoint))
+anton_subsystems.register("search", lambda: getattr(anton_search.backend, "service", None))
+
+def Anton_Search(query, num_results=7):
+    return anton_search.search(query, num_results)
+
 def Should_Anton_search(user_query):
-    model = genai.GenerativeModel('gemini-2.0-flash-thinking-exp')
     decision_prompt = f"""
     You are an intelligent assistant determining whether the user's question requires real-time or updated web information.
 
@@ -95,9 +891,463 @@ def Should_Anton_search(user_query):
 
     Respond ONLY with one word: "yes" or "no".
     """
-    response = model.generate_content(decision_prompt).text.strip().lower()
+    response = anton_models.generate("routing", decision_prompt).text.strip().lower()
     return "yes" in response
 
+# Query Routing
+ROUTER_CLASSIFIER_PATH = os.path.join("models", "router_classifier.json")
+
+# (pattern, weight) pairs; weight is how strongly a match points at that route
+SEARCH_PATTERNS = [
+    (r"\b(today|tonight|yesterday|tomorrow|this (week|month|year)|right now)\b", 0.8),
+    (r"\b(latest|current(ly)?|recent(ly)?|upcoming|breaking|trending)\b", 0.75),
+    (r"\blive (stream(ing)?|scores?|news|updates?|results?|coverage|feed)\b", 0.8),
+    (r"\b(news|headlines?|announce(d|ment)?|released?|launch(ed)?)\b", 0.7),
+    (r"\b(weather|forecast|temperature|humidity)\b", 0.85),
+    (r"\b(will it (rain|snow)|is it (raining|snowing)|(rain|snow) (today|tonight|tomorrow|this week))\b", 0.85),
+    (r"\b(price|prices|stock|shares|market cap|exchange rate|bitcoin|crypto)\b", 0.8),
+    (r"\b(score|scores|fixtures?|standings|tournament|election|poll)\b", 0.7),
+    (r"\b(match (scores?|results?|today|tonight|schedule)|(today's|tonight's|last night's) match)\b", 0.7),
+    (r"\b20[2-9]\d\b", 0.6),
+    (r"\b(near me|open now|showtimes|traffic|flight status)\b", 0.85),
+]
+STATIC_PATTERNS = [
+    (r"^(define|definition of|meaning of)\b", 0.85),
+    (r"\b(convert|in (km|miles|meters|feet|cm|inches|kg|pounds|grams|celsius|fahrenheit))\b", 0.85),
+    (r"^[\d\s.+\-*/()^%x=]+\??$", 0.95),
+    (r"\b(history of|who (was|invented|wrote|discovered|painted))\b", 0.75),
+    (r"\b(synonym|antonym|translate|spell|grammar|pronounce)\b", 0.85),
+    (r"\b(write|compose|draft) (me )?(a|an) (poem|story|joke|email|letter|essay)\b", 0.9),
+    (r"\b(hello|hi|hey|thanks|thank you|good (morning|evening|night))\b", 0.8),
+]
+# Generic question openers say little about freshness; they only break ties, towards no search,
+# and are weighted above the default threshold so a tie is settled without the LLM
+QUESTION_PREFIXES = [
+    (r"^(what is|what's|what are|explain)\b", 0.8),
+    (r"^(how (do|does|to|can)|why (do|does|is|are))\b", 0.8),
+]
+
+
+def normalize_query(user_query: str) -> str:
+    """Lowercases a query and collapses whitespace and trailing punctuation."""
+    return re.sub(r"\s+", " ", user_query.lower()).strip(" ?!.")
+
+
+def tokenize_query(user_query: str) -> list:
+    return re.findall(r"[a-z0-9']+", user_query.lower())
+
+
+class QueryRouter:
+    """
+    Decides whether a query needs a web search.
+    Tiers, cheapest first:
+      - decision cache
+      - keyword/regex rules
+      - optional on-disk classifier (models/router_classifier.json)
+      - LLM fallback (Should_Anton_search) for anything still ambiguous
+    """
+
+    TIERS = ("cache", "keyword", "classifier", "llm")
+
+    def __init__(self, threshold=RouterThreshold, classifier_path=ROUTER_CLASSIFIER_PATH,
+                 cache_size=512, llm_fallback=None):
+        self.threshold = threshold
+        self.cache_size = cache_size
+        self.llm_fallback = llm_fallback or Should_Anton_search
+        self.search_patterns = [(re.compile(p), w) for p, w in SEARCH_PATTERNS]
+        self.static_patterns = [(re.compile(p), w) for p, w in STATIC_PATTERNS]
+        self.question_prefixes = [(re.compile(p), w) for p, w in QUESTION_PREFIXES]
+        self.classifier = self.load_classifier(classifier_path)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {tier: 0 for tier in self.TIERS}
+
+    @staticmethod
+    def load_classifier(path):
+        """Loads {"bias": float, "weights": {token: float}} if present, else None."""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {"bias": float(data.get("bias", 0.0)), "weights": dict(data["weights"])}
+        except Exception as e:
+            print(f"Ignoring router classifier at {path}: {e}")
+            return None
+
+    @staticmethod
+    def train_classifier(samples, path=ROUTER_CLASSIFIER_PATH, smoothing=1.0):
+        """
+        Builds a naive Bayes log-odds classifier from (query, needs_search) pairs
+        and writes it to path.
+        """
+        counts = {True: {}, False: {}}
+        totals = {True: 0, False: 0}
+        docs = {True: 0, False: 0}
+        for query, label in samples:
+            label = bool(label)
+            docs[label] += 1
+            for token in set(tokenize_query(query)):
+                counts[label][token] = counts[label].get(token, 0) + 1
+                totals[label] += 1
+
+        vocab = set(counts[True]) | set(counts[False])
+        weights = {}
+        for token in vocab:
+            p_yes = (counts[True].get(token, 0) + smoothing) / (totals[True] + smoothing * len(vocab))
+            p_no = (counts[False].get(token, 0) + smoothing) / (totals[False] + smoothing * len(vocab))
+            weights[token] = round(math.log(p_yes / p_no), 4)
+        bias = math.log((docs[True] + smoothing) / (docs[False] + smoothing))
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"bias": bias, "weights": weights}, f)
+        return {"bias": bias, "weights": weights}
+
+    def _keyword_tier(self, query):
+        """
+        Returns (needs_search, confidence) from the regex rules, or None if nothing matched.
+        Confidence is the margin between the search and static scores, so one strong rule
+        can decide on its own; question prefixes only settle a tie towards no search.
+        """
+        def combined(patterns):
+            miss = 1.0
+            for pattern, weight in patterns:
+                if pattern.search(query):
+                    miss *= 1.0 - weight
+            return 1.0 - miss
+
+        search_score = combined(self.search_patterns)
+        static_score = combined(self.static_patterns)
+        margin = search_score - static_score
+        if margin == 0:
+            prefix_score = combined(self.question_prefixes)
+            if prefix_score:
+                return False, prefix_score
+            if search_score == 0:
+                return None
+        return margin > 0, abs(margin)
+
+    def _classifier_tier(self, query):
+        if not self.classifier:
+            return None
+        weights = self.classifier["weights"]
+        tokens = [t for t in set(tokenize_query(query)) if t in weights]
+        if not tokens:
+            return None
+        logit = self.classifier["bias"] + sum(weights[t] for t in tokens)
+        p_search = 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, logit))))
+        return p_search >= 0.5, max(p_search, 1.0 - p_search)
+
+    def _local_decision(self, query):
+        with self._lock:
+            if query in self._cache:
+                needs_search, confidence, _ = self._cache[query]
+                return needs_search, confidence, "cache"
+
+        for tier, check in (("keyword", self._keyword_tier), ("classifier", self._classifier_tier)):
+            result = check(query)
+            if result and result[1] >= self.threshold:
+                return result[0], result[1], tier
+        return None
+
+    def decide_locally(self, user_query: str):
+        """Returns (needs_search, confidence, tier) without asking the LLM, or None if unsure."""
+        return self._local_decision(normalize_query(user_query))
+
+    def decide(self, user_query: str):
+        """Returns (needs_search, confidence, tier)."""
+        query = normalize_query(user_query)
+        decision = self._local_decision(query)
+        if decision is None:
+            decision = (bool(self.llm_fallback(user_query)), 1.0, "llm")
+
+        with self._lock:
+            self.stats[decision[2]] += 1
+            if decision[2] == "cache" and query in self._cache:
+                self._cache.move_to_end(query)
+            else:
+                self._cache[query] = decision
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return decision
+
+    def should_search(self, user_query: str) -> bool:
+        return self.decide(user_query)[0]
+
+    def report(self) -> str:
+        total = sum(self.stats.values()) or 1
+        return "Router decisions: " + ", ".join(
+            f"{tier}={count} ({100 * count / total:.0f}%)" for tier, count in self.stats.items()
+        )
+
+anton_router = QueryRouter()
+
+# Response Cache
+class ResponseCache:
+    """
+    Persistent cache of Anton's answers, keyed on the normalised query and its route.
+    Stored in SQLite so answers survive restarts. Search-backed answers expire after
+    search_ttl seconds; static answers only leave through LRU eviction once the
+    cache holds more than max_entries.
+    """
+
+    def __init__(self, path=os.path.join(CACHE_DIR, "responses.db"),
+                 max_entries=ResponseCacheSize, search_ttl=ResponseCacheTTL):
+        self.max_entries = max_entries
+        self.search_ttl = search_ttl
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, route TEXT, response TEXT, created REAL, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+        self._db.commit()
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(user_query, route):
+        return f"{route}:{normalize_query(user_query)}"
+
+    def get(self, user_query, route):
+        if not self.enabled:
+            return None
+        key = self.make_key(user_query, route)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            response, created = row
+            if route == "search" and now - created > self.search_ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.stats["hits"] += 1
+            return response
+
+    def put(self, user_query, route, response):
+        if not self.enabled or not response:
+            return
+        key = self.make_key(user_query, route)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, route, response, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, route, response, now, now),
+            )
+            count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self.stats["evictions"] += overflow
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def report(self) -> str:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = 100 * self.stats["hits"] / lookups if lookups else 0
+        return (
+            f"Response cache: {self.stats['hits']} hits, {self.stats['misses']} misses "
+            f"({hit_rate:.0f}% hit rate), {self.stats['expired']} expired, "
+            f"{self.stats['evictions']} evicted"
+        )
+
+anton_response_cache = ResponseCache()
+
+# Conversation Context
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local estimate of the Gemini token count: one token per word or symbol,
+    plus one for every further 6 characters of a long word.
+    """
+    if not text:
+        return 0
+    return sum(1 + (len(piece) - 1) // 6 for piece in TOKEN_PATTERN.findall(text))
+
+def truncate_to_tokens(text: str, max_tokens: int, keep="head") -> str:
+    """Cuts text down to roughly max_tokens, keeping its start or its end."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    words = text.split()
+    kept = []
+    used = 0
+    for word in (words if keep == "head" else reversed(words)):
+        used += estimate_tokens(word)
+        if used > max_tokens:
+            break
+        kept.append(word)
+    if keep != "head":
+        kept.reverse()
+        return "... " + " ".join(kept)
+    return " ".join(kept) + " ..."
+
+class ConversationContext:
+    """
+    Rolling conversation history for follow-up questions.
+    The most recent turns are kept verbatim; older ones are folded into a short
+    memory by the summarising model in the background. Before each Gemini call the
+    context is trimmed to whatever the token budget leaves after the prompt itself.
+    Only queries that refer back to the conversation get context, so standalone
+    questions stay cheap and cacheable.
+    """
+    FOLLOW_UP_PATTERN = re.compile(
+        r"\b(it|its|that|this|those|these|they|them|their|he|him|his|she|her|there|"
+        r"same|more|else|also|again|another|above|previous|earlier|instead|one)\b"
+        r"|^\s*(and|but|so|what about|how about|why|ok|okay)\b",
+        re.IGNORECASE,
+    )
+
+    def __init__(self, budget=ContextTokenBudget, recent_turns=ContextRecentTurns,
+                 summary_tokens=None, summarize=None):
+        self.budget = budget
+        self.recent_turns = max(1, recent_turns)
+        self.summary_tokens = summary_tokens or max(64, budget // 4)
+        self.summarize = summarize or self._summarize_with_model
+        self.turns = deque()
+        self.memory = ""
+        self._folding = []  # turns being summarised; still sent verbatim until the memory lands
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "prompt_tokens": 0, "context_tokens": 0,
+                      "max_prompt_tokens": 0, "summaries": 0}
+
+    @property
+    def enabled(self):
+        return self.budget > 0
+
+    def is_follow_up(self, user_query: str) -> bool:
+        with self._lock:
+            has_history = bool(self.turns or self._folding or self.memory)
+        return self.enabled and has_history and bool(self.FOLLOW_UP_PATTERN.search(user_query))
+
+    def add_turn(self, user_query: str, response: str):
+        if not self.enabled or not response:
+            return
+        with self._lock:
+            self.turns.append((user_query, response))
+            if len(self.turns) <= self.recent_turns or self._folding:
+                return
+            while len(self.turns) > self.recent_turns:
+                self._folding.append(self.turns.popleft())
+            memory, folding = self.memory, list(self._folding)
+        threading.Thread(target=self._compact, args=(memory, folding), daemon=True).start()
+
+    def _compact(self, memory, folding):
+        started = time.perf_counter()
+        try:
+            new_memory = self.summarize(memory, folding)
+        except Exception as e:
+            print(f"[context] Summarising failed, keeping a truncated memory: {e}")
+            new_memory = self._summarize_locally(memory, folding)
+        new_memory = truncate_to_tokens(new_memory.strip(), self.summary_tokens, keep="tail")
+        with self._lock:
+            self.memory = new_memory
+            self._folding = []
+            self.stats["summaries"] += 1
+        print(f"[context] Folded {len(folding)} turns into memory "
+              f"(~{estimate_tokens(new_memory)} tokens) in {time.perf_counter() - started:.2f}s")
+
+    @staticmethod
+    def format_turn(user_query, response):
+        return f"User: {user_query}\nAnton: {response}"
+
+    def _summarize_with_model(self, memory, turns):
+        transcript = "\n".join(self.format_turn(q, a) for q, a in turns)
+        prompt = f"""
+Condense this conversation into a short memory of at most {self.summary_tokens // 2} words.
+Keep names, facts, numbers and user preferences a follow-up question might refer to.
+Write plain sentences with no preamble.
+
+Existing memory:
+{memory or "(none)"}
+
+New turns:
+{transcript}
+"""
+        return anton_models.generate("summarising", prompt).text
+
+    @staticmethod
+    def _summarize_locally(memory, turns):
+        lines = [memory] if memory else []
+        for user_query, response in turns:
+            first = split_sentences(response)[:1] or [response]
+            lines.append(f"User asked: {user_query} Anton said: {first[0]}")
+        return " ".join(lines)
+
+    def context_for(self, user_query: str, prompt_tokens: int) -> str:
+        """Returns the history to send with a prompt, or "" for standalone queries."""
+        if not self.is_follow_up(user_query):
+            return ""
+        allowance = self.budget - prompt_tokens
+        if allowance <= 0:
+            return ""
+        with self._lock:
+            memory = self.memory
+            turns = self._folding + list(self.turns)
+
+        # Newest turns first, until the allowance runs out
+        picked = []
+        used = 0
+        for user_q, response in reversed(turns):
+            text = self.format_turn(user_q, response)
+            cost = estimate_tokens(text)
+            if used + cost > allowance:
+                if not picked:
+                    picked.append(truncate_to_tokens(text, allowance))
+                    used = allowance
+                break
+            picked.append(text)
+            used += cost
+        picked.reverse()
+        if memory and estimate_tokens(memory) + used <= allowance:
+            picked.insert(0, f"Earlier in the conversation: {memory}")
+        return "\n".join(picked)
+
+    def record_request(self, prompt: str, context: str):
+        prompt_tokens = estimate_tokens(prompt)
+        context_tokens = estimate_tokens(context)
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["context_tokens"] += context_tokens
+            self.stats["max_prompt_tokens"] = max(self.stats["max_prompt_tokens"], prompt_tokens)
+        print(f"[context] ~{prompt_tokens} tokens sent ({context_tokens} context, budget {self.budget})")
+
+    def report(self) -> str:
+        requests = self.stats["requests"]
+        average = self.stats["prompt_tokens"] / requests if requests else 0
+        return (
+            f"Context: {requests} prompts, ~{self.stats['prompt_tokens']} tokens sent "
+            f"(avg ~{average:.0f}, max ~{self.stats['max_prompt_tokens']}), "
+            f"~{self.stats['context_tokens']} from history, {self.stats['summaries']} summaries"
+        )
+
+anton_context = ConversationContext()
+
 def Is_Assistant_Info_Query(user_query: str) -> bool:
     keywords = [
         "who are you", "what is your name", "what can you do", "tell me about yourself",
@@ -113,9 +1363,9 @@ def Anton_Identity_Response() -> str:
         "I'm designed to support you with insights, answers, and tools to make your day easier. "
         "Think of me as your go-to digital companion."
     )
-def Antons_Response(user_query: str) -> str:
-    """Handles all types of user input: assistant info, file commands, search-based queries, or static responses."""
-    
+def Anton_Direct_Response(user_query: str):
+    """Answers assistant info and file commands without the chat model; returns None otherwise."""
+
     # Handle assistant-related identity/info queries
     if Is_Assistant_Info_Query(user_query):
         return Anton_Identity_Response()
@@ -127,22 +1377,25 @@ def Antons_Response(user_query: str) -> str:
             return f"File Operation Complete:\n\n{file_response}"
         else:
             return "Hmm, I couldn't process that file command. Try rephrasing?"
+    return None
 
-    # Initialize model
-    model = genai.GenerativeModel('gemini-2.0-flash-thinking-exp')
+def build_response_prompt(user_query: str, needs_search: bool, search_results=None, context="") -> str:
+    """Builds either the search-backed or the static answer prompt."""
+    history = f"Conversation so far:\n{context}\n\n" if context else ""
 
     # Handle search-needed queries
-    if Should_Anton_search(user_query):
-        search_results = Anton_Search(user_query)
+    if needs_search:
+        if search_results is None:
+            search_results = Anton_Search(user_query)
         search_info = "\n".join([
             f"- Title: {res['title']}\n  URL: {res['link']}\n  Snippet: {res['snippet']}"
             for res in search_results
         ])
 
-        search_prompt = f"""
+        return f"""
 You are Anton, a smart and helpful assistant.
 
-The user asked: "{user_query}"
+{history}The user asked: "{user_query}"
 
 Here are relevant search results:
 {search_info}
@@ -155,14 +1408,12 @@ Instructions:
 
 Response:
 """
-        return model.generate_content(search_prompt).text.strip()
 
     # Handle static queries (no search needed)
-    else:
-        static_prompt = f"""
+    return f"""
 You are Anton, a smart and helpful assistant.
 
-The user asked: "{user_query}"
+{history}The user asked: "{user_query}"
 
 Instructions:
 - Provide a brief, sharp, and human-like answer.
@@ -171,7 +1422,230 @@ Instructions:
 
 Response:
 """
-        return model.generate_content(static_prompt).text.strip()
+
+def pick_context(user_query: str, needs_search: bool, search_results=None, context=None) -> str:
+    """
+    Returns the conversation history that fits next to the answer prompt.
+    context reuses history already picked for this query, trimmed to the remaining budget.
+    """
+    prompt_tokens = estimate_tokens(build_response_prompt(user_query, needs_search, search_results))
+    if context is None:
+        return anton_context.context_for(user_query, prompt_tokens)
+    return truncate_to_tokens(context, max(0, anton_context.budget - prompt_tokens), keep="tail") if context else ""
+
+def prepare_prompt(user_query: str, needs_search: bool, search_results=None, context=None):
+    """
+    Builds the answer prompt with as much conversation history as the token budget allows.
+    Returns the prompt and whether history was included.
+    """
+    if needs_search and search_results is None:
+        search_results = Anton_Search(user_query)
+    context = pick_context(user_query, needs_search, search_results, context)
+    prompt = build_response_prompt(user_query, needs_search, search_results, context)
+    anton_context.record_request(prompt, context)
+    return prompt, bool(context)
+
+def stream_text(response):
+    """Yields the text of each streamed chunk."""
+    for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. safety metadata) are skipped
+            continue
+        if text:
+            yield text
+
+# Speculative Execution
+speculation_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="anton-speculative")
+
+class StageTimings:
+    """Collects per-stage wall-clock timings for one query and prints them."""
+
+    def __init__(self, label):
+        self.label = label
+        self.start = time.perf_counter()
+        self.stages = {}
+
+    def timed(self, stage, func):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.stages[stage] = time.perf_counter() - started
+        return wrapper
+
+    def timed_stream(self, stage, chunks):
+        started = time.perf_counter()
+        try:
+            yield from chunks
+        finally:
+            self.stages[stage] = time.perf_counter() - started
+
+    def mark(self, stage):
+        """Records the time from query start to now."""
+        self.stages[stage] = time.perf_counter() - self.start
+
+    def log(self, serial_estimate=None):
+        total = time.perf_counter() - self.start
+        parts = [f"{stage}={seconds:.2f}s" for stage, seconds in self.stages.items()]
+        line = f"[timing] {self.label}: " + " ".join(parts) + f" total={total:.2f}s"
+        if serial_estimate is not None:
+            line += f" serial~{serial_estimate:.2f}s saved~{max(0.0, serial_estimate - total):.2f}s"
+        print(line)
+
+class SpeculativeStream:
+    """Streams a generation on the speculation pool, buffering chunks until they are read."""
+    _DONE = object()
+
+    def __init__(self, prompt, timings=None, stage="static_answer"):
+        self._queue = queue.Queue()
+        self._cancelled = threading.Event()
+        self._run = timings.timed(stage, self._run) if timings else self._run
+        self.future = speculation_pool.submit(self._run, prompt)
+
+    def _run(self, prompt):
+        try:
+            for text in stream_text(anton_models.generate("answering", prompt, stream=True)):
+                if self._cancelled.is_set():
+                    break
+                self._queue.put(text)
+        except Exception as e:
+            self._queue.put(e)
+        finally:
+            self._queue.put(self._DONE)
+
+    def cancel(self):
+        self._cancelled.set()
+        self.future.cancel()
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+def Speculative_Response_Stream(user_query: str):
+    """
+    Starts the route decision, the web search and the static answer at the same time,
+    then keeps whichever path the router picks and discards the other.
+    """
+    timings = StageTimings(user_query[:40])
+    route_future = speculation_pool.submit(timings.timed("route", anton_router.should_search), user_query)
+    search_future = speculation_pool.submit(timings.timed("search", Anton_Search), user_query)
+    # History is picked once and shared by both prompts, so each query is recorded once
+    context = pick_context(user_query, False)
+    follow_up = bool(context)
+    static_prompt = build_response_prompt(user_query, False, None, context)
+    static_stream = SpeculativeStream(static_prompt, timings)
+
+    try:
+        needs_search = route_future.result()
+        route = "search" if needs_search else "static"
+        # Answers that depend on the conversation so far are neither read from nor written to the cache
+        cached = None if follow_up else anton_response_cache.get(user_query, route)
+        if cached is not None:
+            anton_context.add_turn(user_query, cached)
+            yield cached
+            return
+
+        if needs_search:
+            static_stream.cancel()
+            search_results = search_future.result()
+            prompt, follow_up = prepare_prompt(user_query, True, search_results, context)
+            chunks = timings.timed_stream(
+                "search_answer", stream_text(anton_models.generate("answering", prompt, stream=True)))
+        else:
+            search_future.cancel()
+            anton_context.record_request(static_prompt, context)
+            chunks = static_stream
+
+        parts = []
+        for text in chunks:
+            if not parts:
+                timings.mark("first_chunk")
+            parts.append(text)
+            yield text
+    finally:
+        # Whatever path was not taken (or everything, if routing failed) stops here
+        static_stream.cancel()
+        search_future.cancel()
+    response = "".join(parts).strip()
+    if not follow_up:
+        anton_response_cache.put(user_query, route, response)
+    anton_context.add_turn(user_query, response)
+
+    # What the serial pipeline would have taken: route, then search (if any), then the answer
+    stages = timings.stages
+    if needs_search:
+        serial = stages.get("route", 0.0) + stages.get("search", 0.0) + stages.get("search_answer", 0.0)
+    else:
+        serial = stages.get("route", 0.0) + stages.get("static_answer", 0.0)
+    timings.log(serial_estimate=serial)
+
+def use_speculation(user_query: str) -> bool:
+    """Speculation only pays off when the route has to come from the LLM."""
+    return SpeculativeExecution and anton_router.decide_locally(user_query) is None
+
+def Antons_Response(user_query: str) -> str:
+    """Handles all types of user input: assistant info, file commands, search-based queries, or static responses."""
+    direct_response = Anton_Direct_Response(user_query)
+    if direct_response is not None:
+        return direct_response
+
+    if use_speculation(user_query):
+        return "".join(Speculative_Response_Stream(user_query)).strip()
+
+    needs_search = anton_router.should_search(user_query)
+    route = "search" if needs_search else "static"
+    follow_up = anton_context.is_follow_up(user_query)
+    cached = None if follow_up else anton_response_cache.get(user_query, route)
+    if cached is not None:
+        anton_context.add_turn(user_query, cached)
+        return cached
+
+    prompt, follow_up = prepare_prompt(user_query, needs_search)
+    response = anton_models.generate("answering", prompt).text.strip()
+    if not follow_up:
+        anton_response_cache.put(user_query, route, response)
+    anton_context.add_turn(user_query, response)
+    return response
+
+def Antons_Response_Stream(user_query: str):
+    """Same as Antons_Response, but yields the answer in chunks as Gemini produces them."""
+    direct_response = Anton_Direct_Response(user_query)
+    if direct_response is not None:
+        yield direct_response
+        return
+
+    if use_speculation(user_query):
+        yield from Speculative_Response_Stream(user_query)
+        return
+
+    needs_search = anton_router.should_search(user_query)
+    route = "search" if needs_search else "static"
+    follow_up = anton_context.is_follow_up(user_query)
+    cached = None if follow_up else anton_response_cache.get(user_query, route)
+    if cached is not None:
+        anton_context.add_turn(user_query, cached)
+        yield cached
+        return
+
+    parts = []
+    prompt, follow_up = prepare_prompt(user_query, needs_search)
+    for text in stream_text(anton_models.generate("answering", prompt, stream=True)):
+        parts.append(text)
+        yield text
+    # Only complete answers are cached and remembered
+    response = "".join(parts).strip()
+    if not follow_up:
+        anton_response_cache.put(user_query, route, response)
+    anton_context.add_turn(user_query, response)
+
 FILES_DIR = "Anton_Files"
 os.makedirs(FILES_DIR, exist_ok=True)
 
@@ -179,32 +1653,301 @@ def get_file_path(filename: str) -> str:
     """Returns the full path of the file inside Anton_Files directory."""
     return os.path.join(FILES_DIR, filename)
 
-def create_file(filename: str, content: str) -> str:
-    """Creates a new file with the provided content in Anton_Files directory."""
+# Safe Writes
+TEMP_FILE_PREFIX = ".anton-tmp-"
+temp_file_ids = itertools.count()
+
+def as_chunks(content):
+    """File contents may be a string or an iterable of strings, such as a model stream."""
+    return [content] if isinstance(content, (str, bytes)) else content
+
+def fsync_directory(directory):
+    """Makes a rename durable; directories cannot be opened for fsync on Windows."""
+    if os.name == "nt":
+        return
+    fd = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def atomic_write(filepath, content, before_replace=None, binary=False) -> int:
+    """
+    Writes content to a temporary file in the same folder, fsyncs it and renames it
+    over filepath, so a crash leaves either the complete old file or the complete new one.
+    Chunks are written as they arrive and never joined in memory. before_replace(temp_path)
+    runs once the new file is complete while the old one is still in place.
+    Returns the number of characters (or bytes, when binary) written.
+    """
+    directory, name = os.path.split(filepath)
+    temp_path = os.path.join(directory, f"{TEMP_FILE_PREFIX}{name}.{os.getpid()}.{next(temp_file_ids)}")
+    written = 0
+    try:
+        with (open(temp_path, 'xb') if binary else open(temp_path, 'x', encoding='utf-8')) as f:
+            for chunk in as_chunks(content):
+                f.write(chunk)
+                written += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(filepath):
+            shutil.copymode(filepath, temp_path)
+        if before_replace:
+            before_replace(temp_path)
+        os.replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    fsync_directory(directory)
+    return written
+
+def stream_append(filepath, content, keep_chars=SummaryChunkChars):
+    """
+    Appends content on a new line as it arrives and fsyncs it. Existing bytes are never
+    rewritten, so a crash can at worst cut the new tail short. Returns the number of
+    characters written and the first keep_chars of them (for the summary).
+    """
+    written = 0
+    kept = []
+    kept_chars = 0
+    with open(filepath, 'a', encoding='utf-8') as f:
+        f.write("\n")
+        for chunk in as_chunks(content):
+            f.write(chunk)
+            written += len(chunk)
+            if kept_chars < keep_chars:
+                kept.append(chunk[:keep_chars - kept_chars])
+                kept_chars += len(kept[-1])
+        f.flush()
+        os.fsync(f.fileno())
+    return written, "".join(kept)
+
+def create_file(filename: str, content) -> str:
+    """Creates a new file with the provided content (a string or a stream of chunks) in Anton_Files directory."""
     filepath = get_file_path(filename)
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+        anton_versions.record_before(filename)
+        atomic_write(filepath, content)
+        anton_catalogue.update_entry(filename)
+        anton_versions.record(filename, "create")
         return f"File '{filename}' created at '{filepath}'."
     except Exception as e:
         return f"Error creating file: {e}"
 
+# File Summaries
+def content_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+class SummaryCache:
+    """
+    Persistent cache of model-written summaries, keyed on a SHA-256 content hash.
+    Least recently used entries are evicted once more than max_entries are stored.
+    File hashes are remembered against each file's size and modification time, so an
+    unchanged file is not even re-hashed; when the catalogue reports a file changed or
+    removed, its remembered hash and whole-file summary are dropped.
+    """
+
+    def __init__(self, path=os.path.join(CACHE_DIR, "summaries.db"), max_entries=SummaryCacheSize):
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "key TEXT PRIMARY KEY, kind TEXT, summary TEXT, created REAL, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries(last_used)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS file_hashes (name TEXT PRIMARY KEY, size INTEGER, mtime REAL, digest TEXT)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def make_key(kind, *parts):
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8", errors="surrogatepass"))
+            digest.update(b"\0")
+        return f"{kind}:{digest.hexdigest()}"
+
+    def get(self, key):
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self.stats["hits"] += 1
+            return row[0]
+
+    def put(self, key, summary):
+        if self.max_entries <= 0 or not summary:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO summaries (key, kind, summary, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, key.split(":", 1)[0], summary, now, now),
+            )
+            overflow = self._db.execute("SELECT COUNT(*) FROM summaries").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._db.execute(
+                    "DELETE FROM summaries WHERE key IN "
+                    "(SELECT key FROM summaries ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self.stats["evictions"] += overflow
+            self._db.commit()
+
+    def file_digest(self, filename):
+        """SHA-256 of a file in Anton_Files, reusing the stored hash while size and mtime match."""
+        filepath = get_file_path(filename)
+        stat = os.stat(filepath)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime, digest FROM file_hashes WHERE name = ?", (filename,)
+            ).fetchone()
+        if row and row[:2] == (stat.st_size, stat.st_mtime):
+            return row[2]
+        digest = hashlib.sha256()
+        with open(filepath, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO file_hashes (name, size, mtime, digest) VALUES (?, ?, ?, ?)",
+                (filename, stat.st_size, stat.st_mtime, digest.hexdigest()),
+            )
+            self._db.commit()
+        return digest.hexdigest()
+
+    def forget_files(self, updated, removed):
+        """Catalogue hook: drops the stored hash and file summary of changed or deleted files."""
+        current = {name: (size, modified) for name, size, modified in updated}
+        with self._lock:
+            for filename in list(current) + list(removed):
+                row = self._db.execute(
+                    "SELECT size, mtime, digest FROM file_hashes WHERE name = ?", (filename,)
+                ).fetchone()
+                # Already re-hashed at its new size and mtime
+                if row is None or current.get(filename) == row[:2]:
+                    continue
+                self._db.execute("DELETE FROM file_hashes WHERE name = ?", (filename,))
+                self._db.execute("DELETE FROM summaries WHERE key = ?", (f"file:{row[2]}",))
+            self._db.commit()
+
+    def cached(self, key, produce):
+        """Returns the stored summary for key, or stores and returns produce()."""
+        summary = self.get(key)
+        if summary is None:
+            summary = produce()
+            self.put(key, summary)
+        return summary
+
+    def report(self) -> str:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = 100 * self.stats["hits"] / lookups if lookups else 0
+        return (
+            f"Summary cache: {self.stats['hits']} hits, {self.stats['misses']} misses "
+            f"({hit_rate:.0f}% hit rate), {self.stats['evictions']} evicted"
+        )
+
+anton_summary_cache = SummaryCache()
+summary_pool = ThreadPoolExecutor(max_workers=max(1, SummaryWorkers), thread_name_prefix="anton-summary")
+
+def iter_text_chunks(filepath, chunk_chars=SummaryChunkChars):
+    """Reads a text file in pieces of at most chunk_chars, cutting after a line break (else a space) where possible."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        carry = ""
+        while True:
+            # Top the leftover of the previous cut back up to a full chunk
+            text = carry + f.read(chunk_chars - len(carry))
+            if len(text) < chunk_chars:
+                if text:
+                    yield text
+                return
+            cut = text.rfind("\n") + 1 or text.rfind(" ") + 1 or chunk_chars
+            yield text[:cut]
+            carry = text[cut:]
+
+def summarize_text(text: str) -> str:
+    """One model call summarising a whole (small) text for the user."""
+    summary_prompt = (
+        f"Summarize this file content in plain, helpful language for the user:\n\n{text}\n\n"
+        f"Include only the main ideas or purpose of the content."
+    )
+    return anton_models.generate("summarising", summary_prompt).text.strip()
+
+def summarize_chunk(filename, chunk):
+    def produce():
+        prompt = (
+            f"This is one part of the file '{filename}'. Summarize the main points of this part "
+            f"in a few sentences so they can be merged with summaries of the other parts:\n\n{chunk}"
+        )
+        return anton_models.generate("summarising", prompt).text.strip()
+    return anton_summary_cache.cached(SummaryCache.make_key("chunk", chunk), produce)
+
+def merge_summaries(filename, partials, chunk_chars=SummaryChunkChars):
+    """Reduces partial summaries to one, in rounds if they do not fit in a single prompt."""
+    while len(partials) > 1:
+        groups = [[]]
+        size = 0
+        for partial in partials:
+            if groups[-1] and size + len(partial) > chunk_chars:
+                groups.append([])
+                size = 0
+            groups[-1].append(partial)
+            size += len(partial)
+        if len(groups) == 1:
+            break
+        partials = list(summary_pool.map(
+            lambda group: summarize_chunk(filename, "\n\n".join(group)), groups))
+    prompt = (
+        f"These are summaries of consecutive parts of the file '{filename}':\n\n"
+        + "\n\n".join(f"Part {i}: {partial}" for i, partial in enumerate(partials, 1))
+        + "\n\nCombine them into one summary in plain, helpful language for the user. "
+        "Include only the main ideas or purpose of the content."
+    )
+    return anton_models.generate("summarising", prompt).text.strip()
+
+def summarize_file(filename: str, chunk_chars=SummaryChunkChars) -> str:
+    """
+    Map-reduce summary of a file that is never held in memory as a whole.
+    Chunks are summarised concurrently on summary_pool, with at most twice the
+    pool size read ahead, and each chunk summary is cached by its content hash.
+    Files that fit in one chunk get a single direct summary.
+    """
+    filepath = get_file_path(filename)
+    chunks = iter_text_chunks(filepath, chunk_chars)
+    first = next(chunks, "")
+    second = next(chunks, None)
+    if second is None:
+        return summarize_text(first)
+
+    in_flight = threading.BoundedSemaphore(2 * max(1, SummaryWorkers))
+    futures = []
+    for chunk in itertools.chain([first, second], chunks):
+        in_flight.acquire()
+        future = summary_pool.submit(summarize_chunk, filename, chunk)
+        future.add_done_callback(lambda _: in_flight.release())
+        futures.append(future)
+    partials = [future.result() for future in futures]
+    return merge_summaries(filename, partials, chunk_chars)
+
 def read_file(filename: str) -> str:
-    """Reads and returns the content of a file."""
+    """Reads and returns a summary of the content of a file."""
     filepath = get_file_path(filename)
 
     if not os.path.exists(filepath):
         return f"File `{filename}` not found."
 
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        summary_prompt = (
-            f"Summarize this file content in plain, helpful language for the user:\n\n{content}\n\n"
-            f"Include only the main ideas or purpose of the content."
-        )
-        summary = model.generate_content(summary_prompt).text.strip()
+        digest = anton_summary_cache.file_digest(filename)
+        summary = anton_summary_cache.cached(f"file:{digest}", lambda: summarize_file(filename))
 
         return (
             f"Contents of `{filename}`:\n\n"
@@ -214,32 +1957,160 @@ def read_file(filename: str) -> str:
     except Exception as e:
         return f"Error reading `{filename}`: {e}"
 
-def update_file(filename: str, new_content: str) -> str:
-    """Overwrites the file with new content."""
-    """Overwrites the file with new content and shows a summary of changes."""
-    filepath = get_file_path(filename)
+# File Diffs
+def quote_snippet(text, limit=60):
+    text = " ".join(text.split())
+    return f'"{text[:limit]}..."' if len(text) > limit else f'"{text}"'
 
-    if not os.path.exists(filepath):
-        return f"File `{filename}` does not exist."
+class FileDiff:
+    """
+    Line-level diff between two versions of a file, computed once with difflib.
+    Provides a compact unified diff for the model and, for small edits, a local
+    bullet-point summary with word-level detail for single changed lines.
+    """
 
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            old_content = f.read()
+    def __init__(self, old_text: str, new_text: str, context=2):
+        self.old_lines = old_text.splitlines()
+        self.new_lines = new_text.splitlines()
+        matcher = difflib.SequenceMatcher(None, self.old_lines, self.new_lines)
+        self.groups = list(matcher.get_grouped_opcodes(context)) if old_text != new_text else []
+        self.changes = [op for group in self.groups for op in group if op[0] != "equal"]
+        self.removed = sum(i2 - i1 for _, i1, i2, _, _ in self.changes)
+        self.added = sum(j2 - j1 for _, _, _, j1, j2 in self.changes)
+        self._text = None
+
+    @property
+    def changed_lines(self):
+        return self.added + self.removed
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(new_content)
+    @property
+    def text(self):
+        """Unified diff of the changed hunks with their surrounding context lines."""
+        if self._text is None:
+            lines = []
+            for group in self.groups:
+                first, last = group[0], group[-1]
+                lines.append(f"@@ -{first[1] + 1},{last[2] - first[1]} +{first[3] + 1},{last[4] - first[3]} @@")
+                for tag, i1, i2, j1, j2 in group:
+                    if tag == "equal":
+                        lines.extend(" " + line for line in self.old_lines[i1:i2])
+                        continue
+                    lines.extend("-" + line for line in self.old_lines[i1:i2])
+                    lines.extend("+" + line for line in self.new_lines[j1:j2])
+            self._text = "\n".join(lines)
+        return self._text
 
-        # Generate a summary of the changes
+    @property
+    def digest(self):
+        return content_digest(self.text)
+
+    @staticmethod
+    def describe_line_edit(old_line, new_line):
+        """Word-level description of one edited line."""
+        old_words, new_words = old_line.split(), new_line.split()
+        edits = []
+        for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_words, new_words).get_opcodes():
+            if tag == "replace":
+                edits.append(f"changed {quote_snippet(' '.join(old_words[i1:i2]))} "
+                             f"to {quote_snippet(' '.join(new_words[j1:j2]))}")
+            elif tag == "delete":
+                edits.append(f"removed {quote_snippet(' '.join(old_words[i1:i2]))}")
+            elif tag == "insert":
+                edits.append(f"added {quote_snippet(' '.join(new_words[j1:j2]))}")
+        return ", ".join(edits) or "changed whitespace"
+
+    def local_summary(self) -> str:
+        """Bullet points describing each change without a model call."""
+        if not self.changes:
+            return "No changes."
+        bullets = []
+        for tag, i1, i2, j1, j2 in self.changes:
+            if tag == "insert":
+                if j2 - j1 == 1:
+                    bullets.append(f"- Added line {j1 + 1}: {quote_snippet(self.new_lines[j1])}")
+                else:
+                    bullets.append(f"- Added {j2 - j1} lines after line {i1}")
+            elif tag == "delete":
+                if i2 - i1 == 1:
+                    bullets.append(f"- Removed line {i1 + 1}: {quote_snippet(self.old_lines[i1])}")
+                else:
+                    bullets.append(f"- Removed lines {i1 + 1}-{i2}")
+            elif i2 - i1 == 1 and j2 - j1 == 1:
+                bullets.append(f"- Line {i1 + 1}: {self.describe_line_edit(self.old_lines[i1], self.new_lines[j1])}")
+            else:
+                count = j2 - j1
+                bullets.append(f"- Rewrote lines {i1 + 1}-{i2} as {count} new line{'s' if count != 1 else ''}")
+        return "\n".join(bullets)
+
+def summarize_changes(filename: str, diff: FileDiff, max_chars=SummaryChunkChars) -> str:
+    """Describes a diff locally when it is small, otherwise sends only the diff to the model."""
+    if diff.changed_lines <= LocalDiffMaxLines:
+        return diff.local_summary()
+
+    def produce():
+        diff_text = diff.text
+        if len(diff_text) > max_chars:
+            diff_text = diff_text[:max_chars] + f"\n... ({len(diff.text) - max_chars} more characters of diff)"
         change_prompt = (
-            f"Compare the previous and new version of this file. Describe the changes clearly:\n\n"
-            f"Previous:\n{old_content}\n\nNew:\n{new_content}\n\n"
+            f"This is a unified diff of the file '{filename}' ('-' lines were removed, '+' lines were added). "
+            f"Describe the changes clearly:\n\n{diff_text}\n\n"
             f"Summarize the changes in bullet points."
         )
-        change_summary = model.generate_content(change_prompt).text.strip()
-        summary_prompt = (
-            f"Summarize the overall meaning or goal of the following new file content:\n\n{new_content}"
-        )
-        content_summary = model.generate_content(summary_prompt).text.strip()
+        return anton_models.generate("summarising", change_prompt).text.strip()
+    return anton_summary_cache.cached(SummaryCache.make_key("change", diff.digest), produce)
+
+def count_lines(filepath, block_size=1024 * 1024):
+    with open(filepath, 'rb') as f:
+        return sum(block.count(b"\n") for block in iter(lambda: f.read(block_size), b""))
+
+def diff_files(old_path, new_path, max_bytes=DiffMaxBytes):
+    """
+    FileDiff of two files when both are small enough to hold in memory; for larger
+    files a local summary of the line and size change, computed in bounded memory.
+    """
+    old_size, new_size = os.path.getsize(old_path), os.path.getsize(new_path)
+    if old_size <= max_bytes and new_size <= max_bytes:
+        with open(old_path, 'r', encoding='utf-8') as f:
+            old_content = f.read()
+        with open(new_path, 'r', encoding='utf-8') as f:
+            return FileDiff(old_content, f.read())
+    return (
+        f"- Rewrote the whole file: {count_lines(old_path):,} -> {count_lines(new_path):,} lines "
+        f"({old_size:,} -> {new_size:,} bytes)"
+    )
+
+def update_file(filename: str, new_content) -> str:
+    """
+    Replaces the file with new content (a string or a stream of chunks) and shows a summary
+    of changes. The new version is written to a temporary file and swapped in atomically.
+    """
+    filepath = get_file_path(filename)
+
+    if not os.path.exists(filepath):
+        return f"File `{filename}` does not exist."
+
+    try:
+        # Diff against the old version before it is replaced
+        changes = {}
+        def compare(temp_path):
+            changes["diff"] = diff_files(filepath, temp_path)
+        anton_versions.record_before(filename)
+        atomic_write(filepath, new_content, before_replace=compare)
+        anton_catalogue.update_entry(filename)
+        anton_versions.record(filename, "update")
+
+        # Summarise the changes from the local diff; both summaries run at once and are cached by hash
+        diff = changes["diff"]
+        if isinstance(diff, FileDiff):
+            change_future = summary_pool.submit(summarize_changes, filename, diff)
+        else:
+            change_future = Future()
+            change_future.set_result(diff)
+        # Keyed like read_file, so reading the file right after an update is instant. Runs on
+        # this thread because summarize_file fans out over summary_pool itself.
+        digest = anton_summary_cache.file_digest(filename)
+        content_summary = anton_summary_cache.cached(f"file:{digest}", lambda: summarize_file(filename))
+        change_summary = change_future.result()
 
         return (
             f"`{filename}` was updated.\n\n"
@@ -250,21 +2121,26 @@ def update_file(filename: str, new_content: str) -> str:
         return f"Error updating `{filename}`: {e}"
     
 
-def append_to_file(filename: str, additional_content: str) -> str:
+def append_to_file(filename: str, additional_content) -> str:
     filepath = get_file_path(filename)
 
     if not os.path.exists(filepath):
         return f"File `{filename}` not found."
 
     try:
-        with open(filepath, 'a', encoding='utf-8') as f:
-            f.write("\n" + additional_content)
+        anton_versions.record_before(filename)
+        written, appended = stream_append(filepath, additional_content)
+        anton_catalogue.update_entry(filename)
+        anton_versions.record(filename, "append")
 
-        # Optional: summarize what was appended
+        # Optional: summarize what was appended (its beginning, for very large appends)
         summary_prompt = (
-            f"Summarize in 2-3 sentences the purpose or meaning of the following appended content"
+            f"Summarize in 2-3 sentences the purpose or meaning of the following appended content:\n\n"
+            f"{appended}"
         )
-        summary = model.generate_content(summary_prompt).text.strip()
+        summary = anton_summary_cache.cached(
+            SummaryCache.make_key("append", appended, str(written)),
+            lambda: anton_models.generate("summarising", summary_prompt).text.strip())
 
         return f"Appended to `{filename}`.\n\nSummary of what was added:\n{summary}"
 
@@ -272,12 +2148,15 @@ def append_to_file(filename: str, additional_content: str) -> str:
         return f"Failed to append to `{filename}`: {e}"
     
 def delete_file(filename: str) -> str:
-    """Deletes a file."""
+    """Deletes a file; its last content stays in the version store for "undo file"."""
     filepath = get_file_path(filename)
     if os.path.exists(filepath):
         try:
+            anton_versions.record_before(filename)
             os.remove(filepath)
-            return f"File '{filename}' deleted successfully."
+            anton_catalogue.update_entry(filename)
+            anton_versions.record(filename, "delete")
+            return f"File '{filename}' deleted successfully. Say \"undo file {filename}\" to bring it back."
         except Exception as e:
             return f"Error deleting file: {e}"
     return f"File '{filename}' does not exist."
@@ -285,21 +2164,268 @@ def delete_file(filename: str) -> str:
 def list_files() -> str:
     """Lists all files in the Anton_Files directory."""
     try:
-        files = os.listdir(FILES_DIR)
+        files = anton_catalogue.snapshot()
         if not files:
             return "No files found in the Anton_Files directory."
         
-        file_info = []
-        for filename in files:
-            filepath = get_file_path(filename)
-            size = os.path.getsize(filepath)
-            modified = os.path.getmtime(filepath)
-            file_info.append(f"{filename} - {size} bytes")
+        file_info = [f"{filename} - {size} bytes" for filename, size, _ in files]
         
         return "Files in Anton_Files directory:\n" + "\n".join(file_info)
     except Exception as e:
         return f"Error listing files: {e}"
 
+def scan_files():
+    """Returns {filename: (size, modified)} for each file in Anton_Files from a single scandir pass."""
+    entries = {}
+    with os.scandir(FILES_DIR) as it:
+        for entry in it:
+            if entry.is_file() and not entry.name.startswith(TEMP_FILE_PREFIX):
+                stat = entry.stat()
+                entries[entry.name] = (stat.st_size, stat.st_mtime)
+    return entries
+
+class FileCatalogue(QObject):
+    """
+    In-memory index of Anton_Files.
+    Once watch() is called a QFileSystemWatcher on the folder (not on each file, which
+    would run into the inotify watch limit) marks the catalogue dirty when files are
+    added, removed or renamed, so refresh() is free while nothing has changed. Anton's
+    own edits arrive through update_entry(). Every rescan or single-file update
+    is diffed against the previous state and only the differences are emitted.
+    Without a watcher (e.g. before the UI exists) each refresh() rescans the folder.
+    """
+    changed = Signal(list, list)  # (filename, size, modified) added or updated, filenames removed
+    scanned = Signal(list)  # every filename, after each full rescan
+
+    def __init__(self, directory=FILES_DIR, debounce_ms=150):
+        super().__init__()
+        self.directory = directory
+        self.debounce_ms = debounce_ms
+        self.entries = {}
+        self._dirty = True
+        self._watcher = None
+        self._timer = None
+        self._lock = threading.Lock()
+        self.stats = {"scans": 0, "skipped": 0, "scan_seconds": 0.0, "updates": 0}
+
+    def watch(self):
+        """Starts watching the folder; must be called from the Qt main thread."""
+        if self._watcher is not None:
+            return
+        # One more scan catches anything that changed before the watcher existed
+        self._dirty = True
+        self._watcher = QFileSystemWatcher([self.directory], self)
+        # Bursts of events (e.g. a batch of new files) collapse into one rescan
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.debounce_ms)
+        self._timer.timeout.connect(self.refresh)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._timer.start()
+
+    def _on_directory_changed(self, path):
+        self._dirty = True
+        self._timer.start()
+
+    def refresh(self):
+        """Rescans the folder if it may have changed and emits the difference."""
+        if self._watcher is not None and not self._dirty:
+            self.stats["skipped"] += 1
+            return
+        started = time.perf_counter()
+        self._dirty = False
+        try:
+            current = scan_files()
+        except OSError as e:
+            print(f"Error scanning {self.directory}: {e}")
+            self._dirty = True
+            return
+        with self._lock:
+            previous = self.entries
+            updated = [(name, *info) for name, info in current.items() if previous.get(name) != info]
+            removed = [name for name in previous if name not in current]
+            self.entries = current
+        self.stats["scans"] += 1
+        self.stats["scan_seconds"] += time.perf_counter() - started
+        if updated or removed:
+            self.changed.emit(sorted(updated), removed)
+        self.scanned.emit(sorted(current))
+
+    def update_entry(self, filename):
+        """Re-stats a single file after Anton changes it, without rescanning the folder."""
+        try:
+            stat = os.stat(get_file_path(filename))
+            info = (stat.st_size, stat.st_mtime)
+        except OSError:
+            info = None
+        with self._lock:
+            if self.entries.get(filename) == info:
+                return
+            if info is None:
+                del self.entries[filename]
+            else:
+                self.entries[filename] = info
+        self.stats["updates"] += 1
+        if info is None:
+            self.changed.emit([], [filename])
+        else:
+            self.changed.emit([(filename, *info)], [])
+
+    def snapshot(self):
+        """Returns a sorted list of (filename, size, modified)."""
+        self.refresh()
+        with self._lock:
+            return sorted((name, *info) for name, info in self.entries.items())
+
+    def report(self) -> str:
+        return (
+            f"File catalogue: {len(self.entries)} files, {self.stats['scans']} scans "
+            f"({self.stats['scan_seconds']:.3f}s), {self.stats['skipped']} refreshes skipped, "
+            f"{self.stats['updates']} single-file updates"
+        )
+
+anton_catalogue = FileCatalogue()
+anton_subsystems.register("files", anton_catalogue.snapshot)
+
+class FileSearchIndex:
+    """
+    Full-text index over Anton_Files using SQLite FTS5, ranked with bm25.
+    Follows the file catalogue: each change is re-indexed on a background thread,
+    and files whose size and modification time match the stored ones are skipped,
+    so restarts only read what changed while Anton was closed. The first full scan
+    also drops files that were deleted while Anton was closed.
+    Binary files and files larger than max_bytes are listed by name only.
+    """
+
+    def __init__(self, path=os.path.join(CACHE_DIR, "file_index.db"), max_bytes=FileIndexMaxBytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="anton-index")
+        self._pruned = False
+        self.stats = {"indexed": 0, "skipped": 0, "removed": 0, "searches": 0, "search_seconds": 0.0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, size INTEGER, mtime REAL)")
+        self._db.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS file_text USING fts5("
+            "name UNINDEXED, content, tokenize = 'porter unicode61')"
+        )
+        self._db.commit()
+
+    def schedule(self, updated, removed):
+        """Queues a catalogue diff for indexing; safe to call from any thread."""
+        self._pool.submit(self.apply_changes, updated, removed)
+
+    def schedule_prune(self, names):
+        """Queues removal of files missing from the first full scan; later scans are ignored."""
+        if self._pruned:
+            return
+        self._pruned = True
+        self._pool.submit(self.prune, names)
+
+    def prune(self, names):
+        """Deletes every indexed file that is not in names."""
+        present = set(names)
+        with self._lock:
+            indexed = {name for (name,) in self._db.execute("SELECT name FROM files")}
+            indexed.update(name for (name,) in self._db.execute("SELECT DISTINCT name FROM file_text"))
+            stale = sorted(indexed - present)
+            for filename in stale:
+                self._db.execute("DELETE FROM files WHERE name = ?", (filename,))
+                self._db.execute("DELETE FROM file_text WHERE name = ?", (filename,))
+            self._db.commit()
+        self.stats["removed"] += len(stale)
+
+    def read_text(self, filename, size):
+        if size > self.max_bytes:
+            return ""
+        with open(get_file_path(filename), "rb") as f:
+            data = f.read()
+        if b"\0" in data[:1024]:
+            return ""
+        return data.decode("utf-8", errors="ignore")
+
+    def apply_changes(self, updated, removed):
+        for filename in removed:
+            with self._lock:
+                self._db.execute("DELETE FROM files WHERE name = ?", (filename,))
+                self._db.execute("DELETE FROM file_text WHERE name = ?", (filename,))
+                self._db.commit()
+            self.stats["removed"] += 1
+
+        for filename, size, modified in updated:
+            with self._lock:
+                row = self._db.execute("SELECT size, mtime FROM files WHERE name = ?", (filename,)).fetchone()
+            if row == (size, modified):
+                self.stats["skipped"] += 1
+                continue
+            try:
+                text = self.read_text(filename, size)
+            except OSError as e:
+                # Deleted or locked in the meantime; the catalogue will report it again
+                print(f"Could not index '{filename}': {e}")
+                continue
+            with self._lock:
+                self._db.execute("DELETE FROM file_text WHERE name = ?", (filename,))
+                self._db.execute("INSERT INTO file_text (name, content) VALUES (?, ?)", (filename, text))
+                self._db.execute("INSERT OR REPLACE INTO files (name, size, mtime) VALUES (?, ?, ?)",
+                                 (filename, size, modified))
+                self._db.commit()
+            self.stats["indexed"] += 1
+
+    @staticmethod
+    def build_match(terms: str) -> str:
+        """Turns free text into an FTS5 query: every word must match, the last one as a prefix."""
+        words = re.findall(r"\w+", terms.lower())
+        if not words:
+            return ""
+        quoted = [f'"{word}"' for word in words]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def search(self, terms: str, limit=10):
+        """Returns [(filename, snippet)] ranked best first."""
+        match = self.build_match(terms)
+        if not match:
+            return []
+        started = time.perf_counter()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT name, snippet(file_text, 1, '[', ']', '...', 12) FROM file_text "
+                "WHERE file_text MATCH ? ORDER BY bm25(file_text) LIMIT ?",
+                (match, limit),
+            ).fetchall()
+        self.stats["searches"] += 1
+        self.stats["search_seconds"] += time.perf_counter() - started
+        return rows
+
+    def report(self) -> str:
+        searches = self.stats["searches"]
+        average_ms = 1000 * self.stats["search_seconds"] / searches if searches else 0
+        return (
+            f"File index: {self.stats['indexed']} files indexed, {self.stats['skipped']} unchanged, "
+            f"{self.stats['removed']} removed, {searches} searches (avg {average_ms:.1f}ms)"
+        )
+
+anton_file_index = FileSearchIndex()
+anton_catalogue.changed.connect(anton_file_index.schedule)
+anton_catalogue.scanned.connect(anton_file_index.schedule_prune)
+anton_catalogue.changed.connect(anton_summary_cache.forget_files)
+
+def search_files(terms: str) -> str:
+    """Searches the contents of every file in Anton_Files."""
+    terms = terms.strip()
+    if not terms:
+        return "Tell me what to search for, e.g. \"search files budget 2024\"."
+    started = time.perf_counter()
+    hits = anton_file_index.search(terms)
+    elapsed_ms = 1000 * (time.perf_counter() - started)
+    if not hits:
+        return f"No files mention '{terms}'."
+    lines = [f"{rank}. {filename}: {' '.join(snippet.split())}"
+             for rank, (filename, snippet) in enumerate(hits, 1)]
+    return f"Files matching '{terms}' ({elapsed_ms:.0f}ms):\n" + "\n".join(lines)
+
 def open_file(filename: str) -> str:
     """Opens a file using the appropriate program based on the file extension."""
     filepath = get_file_path(filename)
@@ -318,10 +2444,322 @@ def open_file(filename: str) -> str:
             if os.name == 'nt': 
                 command = f"start \"\" \"{filepath}\""
 
-        subprocess.run(command, shell=True)
-        return f"Opening '{filename}'..."
+        subprocess.run(command, shell=True)
+        return f"Opening '{filename}'..."
+    except Exception as e:
+        return f"Error opening file: {e}"
+
+# File Versions
+class FileVersionStore:
+    """
+    Version history for Anton_Files in .anton_versions. Each distinct content is stored
+    once, addressed by its SHA-256 and zlib-compressed under objects/, as one of:
+      - "append": only the bytes added after the previous version
+      - "delta": line operations against the previous version (both up to delta_max_bytes)
+      - "full": the whole content, when that is smaller or the delta chain gets too long
+    so storage grows with the size of each change. Appends and full copies are
+    compressed and restored as streams, so large files are never loaded whole.
+    """
+    BLOCK_SIZE = 1024 * 1024
+
+    def __init__(self, root=VERSIONS_DIR, max_chain=VersionChainLength, delta_max_bytes=DiffMaxBytes):
+        self.root = root
+        self.objects = os.path.join(root, "objects")
+        self.max_chain = max_chain
+        self.delta_max_bytes = delta_max_bytes
+        self._lock = threading.RLock()
+        os.makedirs(self.objects, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(root, "versions.db"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "digest TEXT PRIMARY KEY, kind TEXT, base TEXT, size INTEGER, stored INTEGER, depth INTEGER)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS versions ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, digest TEXT, action TEXT, "
+            "created REAL, restored_from INTEGER)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS versions_name ON versions(name, id)")
+        self._db.commit()
+
+    # Objects
+    def object_path(self, digest):
+        return os.path.join(self.objects, digest[:2], digest[2:])
+
+    def _write_object(self, digest, chunks) -> int:
+        path = self.object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressor = zlib.compressobj(6)
+
+        def compressed():
+            for chunk in chunks:
+                yield compressor.compress(chunk)
+            yield compressor.flush()
+        atomic_write(path, compressed(), binary=True)
+        return os.path.getsize(path)
+
+    def _read_object(self, digest):
+        decompressor = zlib.decompressobj()
+        with open(self.object_path(digest), "rb") as f:
+            for block in iter(lambda: f.read(self.BLOCK_SIZE), b""):
+                yield decompressor.decompress(block)
+        yield decompressor.flush()
+
+    def _read_file(self, filepath, start=0, length=None):
+        with open(filepath, "rb") as f:
+            f.seek(start)
+            remaining = length
+            while remaining is None or remaining > 0:
+                block = f.read(self.BLOCK_SIZE if remaining is None else min(self.BLOCK_SIZE, remaining))
+                if not block:
+                    return
+                if remaining is not None:
+                    remaining -= len(block)
+                yield block
+
+    def hash_file(self, filepath):
+        """SHA-256 of the file's bytes as they are now, read in blocks."""
+        digest = hashlib.sha256()
+        for block in self._read_file(filepath):
+            digest.update(block)
+        return digest.hexdigest()
+
+    def blob(self, digest):
+        with self._lock:
+            return self._db.execute(
+                "SELECT kind, base, size, stored, depth FROM blobs WHERE digest = ?", (digest,)
+            ).fetchone()
+
+    def iter_content(self, digest):
+        """Streams the stored content for a digest."""
+        kind, base, _, _, _ = self.blob(digest)
+        if kind == "full":
+            yield from self._read_object(digest)
+        elif kind == "append":
+            yield from self.iter_content(base)
+            yield from self._read_object(digest)
+        else:
+            base_lines = b"".join(self.iter_content(base)).splitlines(keepends=True)
+            for op in json.loads(b"".join(self._read_object(digest))):
+                if op[0] == "c":
+                    yield b"".join(base_lines[op[1]:op[2]])
+                else:
+                    yield op[1].encode("latin-1")
+
+    def _store(self, filepath, digest, base):
+        """Stores the file's content under digest, as a delta against base where that pays off."""
+        size = os.path.getsize(filepath)
+        base_row = self.blob(base) if base else None
+        if base_row and base_row[4] >= self.max_chain:
+            base_row = None
+
+        kind, chunks = "full", None
+        if base_row:
+            base_size = base_row[2]
+            prefix = hashlib.sha256()
+            for block in self._read_file(filepath, 0, base_size):
+                prefix.update(block)
+            if 0 < base_size <= size and prefix.hexdigest() == base:
+                kind, chunks = "append", self._read_file(filepath, base_size)
+            elif size <= self.delta_max_bytes and base_size <= self.delta_max_bytes:
+                with open(filepath, "rb") as f:
+                    data = f.read()
+                base_lines = b"".join(self.iter_content(base)).splitlines(keepends=True)
+                new_lines = data.splitlines(keepends=True)
+                ops = []
+                for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, base_lines, new_lines).get_opcodes():
+                    if tag == "equal":
+                        ops.append(["c", i1, i2])
+                    elif j2 > j1:
+                        # latin-1 maps every byte to one character, so any content survives JSON
+                        ops.append(["i", b"".join(new_lines[j1:j2]).decode("latin-1")])
+                delta = json.dumps(ops).encode("utf-8")
+                if len(zlib.compress(delta)) < len(zlib.compress(data)):
+                    kind, chunks = "delta", [delta]
+        if kind == "full":
+            chunks = self._read_file(filepath)
+
+        stored = self._write_object(digest, chunks)
+        depth = base_row[4] + 1 if kind != "full" else 0
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO blobs (digest, kind, base, size, stored, depth) VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, kind, base if kind != "full" else None, size, stored, depth),
+            )
+            self._db.commit()
+
+    # Versions
+    def latest(self, filename):
+        with self._lock:
+            return self._db.execute(
+                "SELECT id, digest, action, restored_from FROM versions WHERE name = ? ORDER BY id DESC LIMIT 1",
+                (filename,),
+            ).fetchone()
+
+    def _add_version(self, filename, digest, action, restored_from=None):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO versions (name, digest, action, created, restored_from) VALUES (?, ?, ?, ?, ?)",
+                (filename, digest, action, time.time(), restored_from),
+            )
+            self._db.commit()
+
+    def record(self, filename, action):
+        """Records the file's current state (or its deletion) as a new version, if it changed."""
+        filepath = get_file_path(filename)
+        with self._lock:
+            latest = self.latest(filename)
+            if not os.path.exists(filepath):
+                if latest is not None and latest[1] is not None:
+                    self._add_version(filename, None, action)
+                return
+            # Hashed here rather than through the summary cache, whose digests trust size
+            # and mtime and could miss an edit that kept both
+            digest = self.hash_file(filepath)
+            if latest is not None and latest[1] == digest:
+                return
+            if self.blob(digest) is None:
+                base = self._db.execute(
+                    "SELECT digest FROM versions WHERE name = ? AND digest IS NOT NULL ORDER BY id DESC LIMIT 1",
+                    (filename,),
+                ).fetchone()
+                self._store(filepath, digest, base[0] if base else None)
+            self._add_version(filename, digest, action)
+
+    def record_before(self, filename):
+        """Saves content Anton has not seen yet (first touch or an outside edit) before changing it."""
+        if os.path.exists(get_file_path(filename)):
+            self.record(filename, "original" if self.latest(filename) is None else "edited outside Anton")
+
+    def history(self, filename):
+        """Returns [(number, id, digest, action, created, size, kind, stored)] oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT v.id, v.digest, v.action, v.created, b.size, b.kind, b.stored "
+                "FROM versions v LEFT JOIN blobs b ON b.digest = v.digest WHERE v.name = ? ORDER BY v.id",
+                (filename,),
+            ).fetchall()
+        return [(number, *row) for number, row in enumerate(rows, 1)]
+
+    def undo(self, filename):
+        """
+        Restores the version before the current one. Consecutive undos keep walking
+        back; there is no redo, but every restored state stays in history.
+        Returns the restored history row, or None when there is nothing older.
+        """
+        filepath = get_file_path(filename)
+        with self._lock:
+            self.record_before(filename)
+            latest = self.latest(filename)
+            if latest is None:
+                return None
+            position = latest[3] if latest[2] == "undo" else latest[0]
+            target = self._db.execute(
+                "SELECT id, digest FROM versions WHERE name = ? AND id < ? ORDER BY id DESC LIMIT 1",
+                (filename, position),
+            ).fetchone()
+            if target is None:
+                return None
+            target_id, digest = target
+            if digest is None:
+                if os.path.exists(filepath):
+                    os.remove(filepath)
+            else:
+                atomic_write(filepath, self.iter_content(digest), binary=True)
+            self._add_version(filename, digest, "undo", restored_from=target_id)
+        anton_catalogue.update_entry(filename)
+        return next(row for row in self.history(filename) if row[1] == target_id)
+
+    def report(self) -> str:
+        with self._lock:
+            blobs, size, stored = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored), 0) FROM blobs"
+            ).fetchone()
+            versions = self._db.execute("SELECT COUNT(*) FROM versions").fetchone()[0]
+        return (
+            f"Versions: {versions} versions, {blobs} contents, {stored:,} bytes stored "
+            f"for {size:,} bytes of content"
+        )
+
+anton_versions = FileVersionStore()
+
+def format_version(row):
+    number, _, digest, action, created, size, kind, stored = row
+    when = time.strftime("%Y-%m-%d %H:%M", time.localtime(created))
+    if digest is None:
+        return f"v{number} · {when} · {action} · file removed"
+    return f"v{number} · {when} · {action} · {size:,} bytes ({kind}, {stored:,} bytes stored)"
+
+def show_versions(filename: str) -> str:
+    history = anton_versions.history(filename)
+    if not history:
+        return f"No saved versions of `{filename}` yet."
+    lines = [format_version(row) for row in reversed(history)]
+    lines[0] += "  <- current"
+    return f"Versions of `{filename}` (newest first):\n" + "\n".join(lines)
+
+def undo_file(filename: str) -> str:
+    try:
+        row = anton_versions.undo(filename)
     except Exception as e:
-        return f"Error opening file: {e}"
+        return f"Couldn't undo `{filename}`: {e}"
+    if row is None:
+        return f"There is no earlier version of `{filename}` to go back to."
+    if row[2] is None:
+        return f"`{filename}` is removed again, as in {format_version(row)}"
+    return f"Restored `{filename}` to {format_version(row)}"
+
+# Batch File Creation
+BATCH_CREATE_PATTERN = re.compile(r"^\s*create files\s+(.+?)(?:\s+with\s+(.+))?$", re.IGNORECASE | re.DOTALL)
+
+def parse_batch_create(user_query: str):
+    """Returns (filenames, content prompt) for "create files a.py, b.py and c.md with ...", else None."""
+    match = BATCH_CREATE_PATTERN.match(user_query)
+    if not match:
+        return None
+    names = [name.strip() for name in re.split(r",|\s+and\s+", match.group(1))]
+    filenames = list(dict.fromkeys(name for name in names if name))
+    if not filenames:
+        return None
+    return filenames, (match.group(2) or "").strip()
+
+def iter_create_files(filenames, content_prompt, max_workers=BatchWorkers):
+    """
+    Generates the content of several files at once on a capped worker pool, each
+    streamed straight into its file. Yields (filename, message) in completion order.
+    """
+    def generate(filename):
+        if not content_prompt:
+            return create_file(filename, "")
+        others = ", ".join(name for name in filenames if name != filename)
+        generation_prompt = f"Write content for a file named '{filename}'. {content_prompt}"
+        if others:
+            generation_prompt += f"\nIt is created together with: {others}. Keep them consistent."
+        return create_file(filename, stream_text(anton_models.generate("writing", generation_prompt, stream=True)))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(filenames))),
+                            thread_name_prefix="anton-batch") as pool:
+        futures = {pool.submit(generate, filename): filename for filename in filenames}
+        try:
+            for future in as_completed(futures):
+                filename = futures[future]
+                try:
+                    yield filename, future.result()
+                except Exception as e:
+                    yield filename, f"Error creating '{filename}': {e}"
+        finally:
+            # Abandoned part way (e.g. the request was cancelled): skip files not yet started
+            for future in futures:
+                future.cancel()
+
+def create_files(filenames, content_prompt, on_progress=None, max_workers=BatchWorkers) -> str:
+    """Creates several files in parallel; on_progress(done, total, filename) runs after each one."""
+    lines = []
+    for done, (filename, message) in enumerate(iter_create_files(filenames, content_prompt, max_workers), 1):
+        lines.append(f"- {message}")
+        if on_progress:
+            on_progress(done, len(filenames), filename)
+    return f"Created {len(filenames)} files:\n" + "\n".join(lines)
 
 def process_file_command(user_query: str) -> str:
     """
@@ -329,10 +2767,30 @@ def process_file_command(user_query: str) -> str:
     Added commands:
       - "list files"
       - "append to file <filename> with <prompt>"
+      - "search files <terms>"
+      - "create files <a>, <b> and <c> with <prompt>"
+      - "undo file <filename>"
+      - "show versions of <filename>"
     """
     lower_q = user_query.lower().strip()
     if lower_q == "list files":
         return list_files()
+
+    if lower_q.startswith("search files"):
+        return search_files(user_query.strip()[len("search files"):])
+
+    batch = parse_batch_create(user_query)
+    if batch:
+        return create_files(*batch)
+
+    if lower_q.startswith("undo file"):
+        return undo_file(user_query.strip()[len("undo file"):].strip())
+
+    if lower_q.startswith("show versions of"):
+        filename = user_query.strip()[len("show versions of"):].strip()
+        if filename.lower().startswith("file "):
+            filename = filename[len("file "):].strip()
+        return show_versions(filename)
     
     if lower_q.startswith("create file"):
         try:
@@ -341,7 +2799,8 @@ def process_file_command(user_query: str) -> str:
             if len(parts) > 1:
                 content_prompt = parts[1].strip()
                 generation_prompt = f"Write content for a file named '{filename}'. {content_prompt}"
-                file_content = model.generate_content(generation_prompt).text
+                # Written to disk chunk by chunk as the model produces it
+                file_content = stream_text(anton_models.generate("writing", generation_prompt, stream=True))
             else:
                 file_content = ""
                 
@@ -362,7 +2821,7 @@ def process_file_command(user_query: str) -> str:
             if len(parts) > 1:
                 new_content_prompt = parts[1].strip()
                 generation_prompt = f"Write updated content for a file named '{filename}'. {new_content_prompt}"
-                new_content = model.generate_content(generation_prompt).text
+                new_content = stream_text(anton_models.generate("writing", generation_prompt, stream=True))
             else:
                 new_content = ""
                 
@@ -379,7 +2838,7 @@ def process_file_command(user_query: str) -> str:
                 append_content_prompt = parts[1].strip()
                 # Generate content to append using LLM
                 generation_prompt = f"Write additional content to append to a file named '{filename}'. {append_content_prompt}"
-                append_content = model.generate_content(generation_prompt).text
+                append_content = stream_text(anton_models.generate("writing", generation_prompt, stream=True))
             else:
                 append_content = ""
                 
@@ -405,73 +2864,444 @@ def process_file_command(user_query: str) -> str:
 def is_file_related_query(user_query: str) -> bool:
     keywords = [
         "create file", "read file", "update file", "append to file", 
-        "delete file", "open file", "list files", "write to file"
+        "delete file", "open file", "list files", "write to file", "search files",
+        "undo file", "show versions of"
     ]
     lower_q = user_query.lower()
     return any(kw in lower_q for kw in keywords)
 
-class SpeechRecognitionThread(QThread):
+# Audio Worker
+class AudioWorker(QThread):
+    """
+    Long-lived microphone worker. The input stream stays open for the life of the app
+    and the last moments of audio are kept in a ring buffer, so listening starts
+    instantly and includes what was said just before the button was pressed.
+    Modes:
+      - "push_to_talk": one utterance per start_listening() call
+      - "continuous": every utterance until stop_listening() is called
+    """
     result = Signal(str)
+    partial = Signal(str)
     listening_status = Signal(bool)
-    
-    def run(self):
-        self.listening_status.emit(True)
-        recognized_text = recognize_speech()
-        self.result.emit(recognized_text)
-        self.listening_status.emit(False)
+    ready = Signal(bool)
 
-# Speech Recognition Thread
-class SpeechRecognitionThread(QThread):
-    result = Signal(str)
-    listening_status = Signal(bool)
-    
-    def __init__(self, vosk_stt):
-        super().__init__()
-        self.vosk_stt = vosk_stt
-        
-    def run(self):
-        self.listening_status.emit(True)
-        recognized_text = recognize_speech(self.vosk_stt)
-        self.result.emit(recognized_text)
-        self.listening_status.emit(False)
+    PUSH_TO_TALK = "push_to_talk"
+    CONTINUOUS = "continuous"
+
+    def __init__(self, mode=VoiceMode, language=SpeechLanguage, preroll_seconds=0.5, parent=None):
+        super().__init__(parent)
+        self.mode = mode
+        self.language = language
+        blocks = max(1, round(preroll_seconds * SAMPLE_RATE / FRAMES_PER_BUFFER))
+        self.ring = deque(maxlen=blocks)
+        self._listen = threading.Event()
+        self._finish = threading.Event()
+        self._running = True
+
+    def start_listening(self):
+        self._finish.clear()
+        self._listen.set()
+
+    def stop_listening(self):
+        """Ends the current utterance now (push-to-talk release / leave continuous mode)."""
+        self._finish.set()
+
+    def is_listening(self):
+        return self._listen.is_set()
+
+    def stop(self):
+        self._running = False
+        self.wait(2000)
 
-class SpeechRecognitionThread(QThread):
-    result = Signal(str)
-    listening_status = Signal(bool)
-    
     def run(self):
-        self.listening_status.emit(True)
-        recognized_text = recognize_speech()
-        self.result.emit(recognized_text)
-        self.listening_status.emit(False)
+        try:
+            stt = VoskStreamingRecognizer(language=self.language, on_partial=self.partial.emit)
+        except Exception as e:
+            print(f"Vosk unavailable ({e}); using Google speech recognition")
+            self.ready.emit(False)
+            self._run_online()
+            return
+
+        if self.mode == self.CONTINUOUS:
+            self._listen.set()
+        try:
+            stream = get_pyaudio().open(format=pyaudio.paInt16, channels=1, rate=SAMPLE_RATE,
+                                        input=True, frames_per_buffer=FRAMES_PER_BUFFER)
+        except Exception as e:
+            print(f"Microphone unavailable: {e}")
+            self.ready.emit(False)
+            return
+        self.ready.emit(True)
+        active = False
+        deadline = 0.0
+        try:
+            while self._running:
+                data = stream.read(FRAMES_PER_BUFFER, exception_on_overflow=False)
+                if not self._listen.is_set():
+                    self.ring.append(data)
+                    continue
+
+                if not active:
+                    # Include the pre-roll so the first syllable is not clipped
+                    active = True
+                    stt.reset()
+                    data = b"".join(self.ring) + data
+                    self.ring.clear()
+                    deadline = time.monotonic() + MAX_UTTERANCE_SECONDS
+                    self.listening_status.emit(True)
+
+                text = stt.feed(data)
+                ended = text is not None
+                if not ended and (self._finish.is_set() or time.monotonic() > deadline):
+                    text = stt.finish()
+                    ended = True
+                if not ended:
+                    continue
+
+                if self.mode == self.CONTINUOUS and not self._finish.is_set():
+                    if text:
+                        self.result.emit(text)
+                    deadline = time.monotonic() + MAX_UTTERANCE_SECONDS
+                    continue
+
+                self.result.emit(text or NOT_UNDERSTOOD_MESSAGE)
+                self._listen.clear()
+                self._finish.clear()
+                active = False
+                self.listening_status.emit(False)
+        except Exception as e:
+            print(f"Audio worker stopped: {e}")
+            if active:
+                self.listening_status.emit(False)
+        finally:
+            stream.stop_stream()
+            stream.close()
+
+    def _run_online(self):
+        while self._running:
+            if not self._listen.wait(0.2) or not self._running:
+                continue
+            self.listening_status.emit(True)
+            self.result.emit(recognize_speech_online())
+            if self.mode != self.CONTINUOUS or self._finish.is_set():
+                self._listen.clear()
+                self._finish.clear()
+                self.listening_status.emit(False)
 
 # Response Processing Thread
+def respond(query, stream=StreamResponses, cancelled=None):
+    """
+    Answers one message. Yields ("progress", percent), ("chunk", text) while streaming
+    and ("result", response) once. Stops early, without a result, once cancelled is set.
+    """
+    yield "progress", 20
+
+    # Batch file creation reports each file as it is written
+    batch = parse_batch_create(query)
+    if batch:
+        filenames, content_prompt = batch
+        parts = [f"Creating {len(filenames)} files:\n"]
+        yield "chunk", parts[0]
+        for done, (filename, message) in enumerate(iter_create_files(filenames, content_prompt), 1):
+            parts.append(f"- {message}\n")
+            yield "chunk", parts[-1]
+            yield "progress", 20 + 80 * done // len(filenames)
+        yield "result", "".join(parts).strip()
+        return
+
+    file_command_result = process_file_command(query)
+
+    if file_command_result:
+        yield "result", file_command_result
+        yield "progress", 100
+        return
+
+    if query.lower() in ["who are you", "who are you ?", "what are you", "what are you ?", "introduce yourself"]:
+        response = "I am Anton, your AI assistant. How can I help you today?"
+    elif stream:
+        yield "progress", 50
+        parts = []
+        for text in Antons_Response_Stream(query):
+            if cancelled is not None and cancelled.is_set():
+                return
+            parts.append(text)
+            yield "chunk", text
+        response = "".join(parts).strip()
+        yield "progress", 80
+    else:
+        # Simulate progress for better UX
+        yield "progress", 50
+        response = Antons_Response(query)
+        yield "progress", 80
+    yield "result", response
+    yield "progress", 100
+
 class ResponseThread(QThread):
+    """Answers a single message on its own thread."""
     result = Signal(str)
     progress = Signal(int)
+    chunk = Signal(str)
     
-    def __init__(self, query):
+    def __init__(self, query, stream=StreamResponses):
         super().__init__()
         self.query = query
+        self.stream = stream
         
     def run(self):
-            self.progress.emit(20)
-            file_command_result = process_file_command(self.query)
-            
-            if file_command_result:
-                self.result.emit(file_command_result)
-                self.progress.emit(100)
+        for kind, payload in respond(self.query, self.stream):
+            getattr(self, kind).emit(payload)
+
+# Request Scheduling
+class ResponseTask(QRunnable):
+    """Runs one scheduled request on the scheduler's thread pool."""
+
+    def __init__(self, request_id, query, handler, stream, events):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.request_id = request_id
+        self.query = query
+        self.handler = handler
+        self.stream = stream
+        self.events = events
+        self.cancelled = threading.Event()
+        self.submitted = time.perf_counter()
+
+    def run(self):
+        try:
+            for kind, payload in self.handler(self.query, self.stream, self.cancelled):
+                if self.cancelled.is_set():
+                    break
+                self.events.emit(self.request_id, kind, payload)
+        except Exception as e:
+            print(f"Request {self.request_id} failed: {e}")
+            self.events.emit(self.request_id, "result", f"Sorry, something went wrong while answering: {e}")
+        finally:
+            self.events.emit(self.request_id, "done", None)
+
+class RequestScheduler(QObject):
+    """
+    Runs messages on a bounded QThreadPool and delivers their output in the order
+    they were sent. Each request gets an ID; only the oldest unfinished request
+    streams live, later ones are buffered until it completes. Requests can be
+    cancelled, and once more than max_pending are waiting the oldest queued query is
+    dropped as outdated and reported through dropped. Requests for which
+    exclusive(query) is true (file commands) are never dropped, and they run alone:
+    they start only after every earlier request has finished, and later requests
+    wait for them, so file changes happen in the order they were sent.
+    handler(query, stream, cancelled) yields (kind, payload) events like respond(),
+    so a fake backend can stand in for the model.
+    """
+    started = Signal(int)
+    chunk = Signal(int, str)
+    progress = Signal(int, int)
+    result = Signal(int, str)
+    finished = Signal(int)
+    cancelled = Signal(int)
+    dropped = Signal(int)
+    _events = Signal(int, str, object)
+
+    def __init__(self, handler=respond, max_workers=MaxConcurrentRequests,
+                 max_pending=MaxPendingRequests, stream=StreamResponses,
+                 exclusive=is_file_related_query, parent=None):
+        super().__init__(parent)
+        self.handler = handler
+        self.exclusive = exclusive
+        self.max_pending = max(2, max_pending)
+        self.stream = stream
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, max_workers))
+        self._ids = itertools.count(1)
+        self._tasks = {}
+        self._order = deque()
+        self._buffers = {}
+        self._done = set()
+        self._held = deque()  # submitted but not started yet, oldest first
+        self._running = {}  # started and not done, including cancelled ones still winding down
+        self._announced = None
+        self.stats = {"submitted": 0, "completed": 0, "cancelled": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+        self._events.connect(self._on_event)
+
+    def submit(self, query) -> int:
+        request_id = next(self._ids)
+        task = ResponseTask(request_id, query, self.handler, self.stream, self._events)
+        task.exclusive = self.exclusive(query)
+        self._tasks[request_id] = task
+        self._buffers[request_id] = []
+        self._order.append(request_id)
+        self.stats["submitted"] += 1
+        self._held.append(task)
+        self._start_ready()
+        # Too much backlog: the oldest query that has not started delivering is outdated.
+        # File commands are kept even past the limit, so no write is ever lost.
+        if len(self._order) > self.max_pending:
+            outdated = next((queued for queued in itertools.islice(self._order, 1, len(self._order) - 1)
+                             if not self._tasks[queued].exclusive), None)
+            if outdated is not None:
+                self.dropped.emit(outdated)
+                self.cancel(outdated)
+        self._drain()
+        return request_id
+
+    def pending_count(self):
+        return len(self._order)
+
+    def cancel(self, request_id):
+        task = self._tasks.pop(request_id, None)
+        if task is None:
+            return
+        task.cancelled.set()
+        if task in self._held:
+            self._held.remove(task)
+        elif self.pool.tryTake(task):
+            del self._running[request_id]
+        self._order.remove(request_id)
+        self._buffers.pop(request_id, None)
+        self._done.discard(request_id)
+        self.stats["cancelled"] += 1
+        self.cancelled.emit(request_id)
+        self._start_ready()
+        self._drain()
+
+    def cancel_all(self):
+        # Newest first, so no queued request is promoted to the head on the way
+        for request_id in reversed(self._order.copy()):
+            self.cancel(request_id)
+
+    def shutdown(self, timeout_ms=2000):
+        self.cancel_all()
+        self.pool.waitForDone(timeout_ms)
+
+    def _start_ready(self):
+        """Starts held requests in order, up to the first one that has to wait."""
+        while self._held:
+            task = self._held[0]
+            if task.exclusive and self._running:
+                return  # a file command waits for everything before it
+            if any(running.exclusive for running in self._running.values()):
+                return  # and everything after it waits for the file command
+            self._held.popleft()
+            self._running[task.request_id] = task
+            self.pool.start(task)
+
+    def _on_event(self, request_id, kind, payload):
+        if kind == "done" and request_id in self._running:
+            del self._running[request_id]
+            self._start_ready()
+        if request_id not in self._tasks:
+            return  # cancelled; late output is dropped
+        if kind == "done":
+            self._done.add(request_id)
+        else:
+            self._buffers[request_id].append((kind, payload))
+        self._drain()
+
+    def _drain(self):
+        """Delivers buffered output for requests at the head of the queue, in order."""
+        while self._order:
+            head = self._order[0]
+            if self._announced != head:
+                self._announced = head
+                self.started.emit(head)
+            events, self._buffers[head] = self._buffers[head], []
+            for kind, payload in events:
+                if kind == "progress":
+                    self.progress.emit(head, payload)
+                elif kind == "chunk":
+                    self.chunk.emit(head, payload)
+                elif kind == "result":
+                    self.result.emit(head, payload)
+            if head not in self._done:
                 return
-            else:
-                if self.query.lower() in ["who are you", "who are you ?", "what are you", "what are you ?", "introduce yourself"]:
-                    response = "I am Anton, your AI assistant. How can I help you today?"
-                else:
-                    # Simulate progress for better UX
-                    self.progress.emit(50)
-                    response = Antons_Response(self.query)
-                    self.progress.emit(80)
-                self.result.emit(response)
-            self.progress.emit(100)
+            self._order.popleft()
+            del self._buffers[head]
+            self._done.discard(head)
+            task = self._tasks.pop(head)
+            elapsed = time.perf_counter() - task.submitted
+            self.stats["completed"] += 1
+            self.stats["total_seconds"] += elapsed
+            self.stats["max_seconds"] = max(self.stats["max_seconds"], elapsed)
+            self.finished.emit(head)
+
+    def report(self) -> str:
+        completed = self.stats["completed"]
+        average = self.stats["total_seconds"] / completed if completed else 0
+        return (
+            f"Requests: {self.stats['submitted']} submitted, {completed} answered "
+            f"(avg {average:.2f}s, max {self.stats['max_seconds']:.2f}s), {self.stats['cancelled']} cancelled"
+        )
+
+# Conversation History
+class ConversationStore:
+    """
+    Append-only JSONL conversation log, one message per line. History is read
+    backwards from a byte offset, so restoring the last N messages costs O(N)
+    no matter how long the log has grown.
+    """
+
+    def __init__(self, path=HISTORY_PATH, block_size=64 * 1024):
+        self.path = path
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # A crash mid-write can leave a partial last line; start the next entry on a fresh line
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb+') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+    def append(self, text, is_user, timestamp=None):
+        record = {
+            "t": time.time() if timestamp is None else timestamp,
+            "role": "user" if is_user else "assistant",
+            "text": text,
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def tail(self, count):
+        """Returns (last count messages oldest first, offset to continue reading backwards from)."""
+        return self.read_before(self.size(), count)
+
+    def read_before(self, offset, count):
+        """Returns up to count messages ending at byte offset, and the offset where they start."""
+        records = []
+        with self._lock:
+            if offset <= 0 or not os.path.exists(self.path):
+                return [], 0
+            with open(self.path, 'rb') as f:
+                buf_start, buf = offset, b""
+                end = offset
+                while end > 0 and len(records) < count:
+                    # Start of the line whose newline is at end - 1
+                    newline = buf.rfind(b"\n", 0, max(0, end - buf_start - 1))
+                    if newline == -1 and buf_start > 0:
+                        keep = buf[:end - buf_start]
+                        read = min(self.block_size, buf_start)
+                        buf_start -= read
+                        f.seek(buf_start)
+                        buf = f.read(read) + keep
+                        continue
+                    line_start = buf_start + newline + 1
+                    raw = buf[line_start - buf_start:end - buf_start].strip()
+                    end = line_start
+                    if not raw:
+                        continue
+                    try:
+                        records.append(json.loads(raw.decode('utf-8')))
+                    except ValueError:
+                        continue
+        records.reverse()
+        return records, end
+
+    @staticmethod
+    def to_message(record):
+        return ChatMessage(record.get("text", ""), record.get("role") == "user", record.get("t"))
 
 # Custom Widgets
 class PulseAnimation(QObject):
@@ -491,6 +3321,8 @@ class PulseAnimation(QObject):
         self.animation.stop()
 
 class WaveCircle(QWidget):
+    clicked = Signal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setMinimumSize(40, 40)
@@ -522,6 +3354,10 @@ class WaveCircle(QWidget):
                               self.height()/2 - radius/2, 
                               radius, radius)
     
+    def mousePressEvent(self, event):
+        self.clicked.emit()
+        super().mousePressEvent(event)
+
     def start_waves(self):
         self._active = True
         self._waves = []
@@ -567,131 +3403,264 @@ class ThemeColors:
     WARNING = "#FFCB6B"           # Amber yellow for warnings
 
 
-class ChatBubble(QFrame):
-    def __init__(self, text, is_user=False, parent=None):
-        super().__init__(parent)
-        self.is_user = is_user
+class ChatMessage:
+    """One transcript entry; kept deliberately small since the transcript can hold thousands."""
+    __slots__ = ("uid", "text", "is_user", "timestamp", "version")
+    _ids = itertools.count()
+
+    def __init__(self, text, is_user=False, timestamp=None):
+        self.uid = next(self._ids)
         self.text = text
-        
-        self.setObjectName("chatBubble")
-        self.setFrameShape(QFrame.StyledPanel)
-        self.setFrameShadow(QFrame.Raised)
-        self.setLineWidth(1)
-        self.setMinimumWidth(200)
-        self.setMaximumWidth(600)
-        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        
-        # Create layout FIRST
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(15, 12, 15, 12)
-        
-        # Create message text FIRST
-        self.message_label = QLabel(text)  # CREATE LABEL FIRST
-        self.message_label.setObjectName("messageText")
-        self.message_label.setWordWrap(True)  # THEN SET PROPERTIES
-        self.message_label.setMaximumWidth(550)
-        self.message_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
-        self.message_label.setFont(QFont("Segoe UI", 11))
-        layout.addWidget(self.message_label)
-        # Create layout
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(15, 12, 15, 12)
-        
-        # Create message text
-        self.message_label = QLabel(text)
-        self.message_label.setObjectName("messageText")
-        self.message_label.setWordWrap(True)
-        self.message_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
-        self.message_label.setFont(QFont("Segoe UI", 11))
-        layout.addWidget(self.message_label)
-        
-        # Create timestamp
-        current_time = time.strftime("%H:%M")
-        self.time_label = QLabel(current_time)
-        self.time_label.setObjectName("timeLabel")
-        self.time_label.setFont(QFont("Segoe UI", 8))
-        self.time_label.setAlignment(Qt.AlignRight)
-        layout.addWidget(self.time_label)
-        
-        # Set style based on sender
-        self.update_style()
-            
-    def update_style(self):
-        if self.is_user:
-            self.setStyleSheet(f"""
-                #chatBubble {{
-                    background-color: {ThemeColors.USER_BUBBLE};
-                    border-radius: 18px;
-                    border-top-right-radius: 4px;
-                    border: none;
-                }}
-                #messageText {{
-                    color: {ThemeColors.TEXT_PRIMARY};
-                    background: transparent;
-                }}
-                #timeLabel {{
-                    color: rgba(248, 248, 242, 0.7);
-                    background: transparent;
-                }}
-            """)
-        else:
-            self.setStyleSheet(f"""
-                #chatBubble {{
-                    background-color: {ThemeColors.ASSISTANT_BUBBLE};
-                    border-radius: 18px;
-                    border-top-left-radius: 4px;
-                    border: none;
-                }}
-                #messageText {{
-                    color: {ThemeColors.TEXT_PRIMARY};
-                    background: transparent;
-                }}
-                #timeLabel {{
-                    color: rgba(248, 248, 242, 0.7);
-                    background: transparent;
-                }}
-            """)
-            
-    def enterEvent(self, event):
-        # Subtle hover effect
-        if self.is_user:
-            self.setStyleSheet(f"""
-                #chatBubble {{
-                    background-color: #2D2B55;
-                    border-radius: 18px;
-                    border-top-right-radius: 4px;
-                    border: none;
-                }}
-                #messageText {{
-                    color: {ThemeColors.TEXT_PRIMARY};
-                    background: transparent;
-                }}
-                #timeLabel {{
-                    color: rgba(248, 248, 242, 0.7);
-                    background: transparent;
-                }}
-            """)
+        self.is_user = is_user
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.version = 0
+
+
+class ChatMessageModel(QAbstractListModel):
+    MessageRole = Qt.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._messages = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._messages)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        message = self._messages[index.row()]
+        if role == Qt.DisplayRole:
+            return message.text
+        if role == self.MessageRole:
+            return message
+        return None
+
+    def message(self, row):
+        return self._messages[row]
+
+    def append_message(self, text, is_user=False, timestamp=None):
+        """Adds a message at the bottom and returns its row."""
+        row = len(self._messages)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._messages.append(ChatMessage(text, is_user, timestamp))
+        self.endInsertRows()
+        return row
+
+    def extend_messages(self, messages):
+        """Adds many ChatMessages at the bottom in one insert."""
+        if not messages:
+            return
+        first = len(self._messages)
+        self.beginInsertRows(QModelIndex(), first, first + len(messages) - 1)
+        self._messages.extend(messages)
+        self.endInsertRows()
+
+    def prepend_messages(self, messages):
+        """Adds older ChatMessages above the current ones in one insert."""
+        if not messages:
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(messages) - 1)
+        self._messages[:0] = messages
+        self.endInsertRows()
+
+    def append_text(self, row, text):
+        """Appends streamed text to an existing message."""
+        message = self._messages[row]
+        message.text += text
+        message.version += 1
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+
+class ChatBubbleDelegate(QStyledItemDelegate):
+    """
+    Paints chat bubbles directly instead of building a widget per message.
+    Text sizes are cached per message (recomputed when its text or the width changes);
+    text layouts (QStaticText) are kept in a small LRU since only visible rows are painted.
+    """
+    PADDING_X = 15
+    PADDING_Y = 12
+    SPACING = 10
+    MAX_TEXT_WIDTH = 550
+    MIN_BUBBLE_WIDTH = 200
+    LAYOUT_CACHE_SIZE = 256
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.font = QFont("Segoe UI", 11)
+        self.time_font = QFont("Segoe UI", 8)
+        self.time_height = QFontMetrics(self.time_font).height()
+        self._sizes = {}
+        self._reported = {}
+        self._layouts = OrderedDict()
+
+    def _text_width(self, view_width):
+        return max(50, min(self.MAX_TEXT_WIDTH, int(view_width * 0.75) - 2 * self.PADDING_X))
+
+    def _static_text(self, message, width):
+        key = (message.version, width)
+        cached = self._layouts.get(message.uid)
+        if cached is not None and cached[0] == key:
+            self._layouts.move_to_end(message.uid)
+            return cached[1]
+        static = QStaticText(message.text)
+        static.setTextFormat(Qt.PlainText)
+        static.setTextWidth(width)
+        option = QTextOption()
+        option.setWrapMode(QTextOption.WrapAtWordBoundaryOrAnywhere)
+        static.setTextOption(option)
+        static.prepare(QTransform(), self.font)
+        self._layouts[message.uid] = (key, static)
+        self._layouts.move_to_end(message.uid)
+        while len(self._layouts) > self.LAYOUT_CACHE_SIZE:
+            self._layouts.popitem(last=False)
+        return static
+
+    def _text_size(self, message, width):
+        key = (message.version, width)
+        cached = self._sizes.get(message.uid)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        rect = QFontMetrics(self.font).boundingRect(
+            0, 0, width, 1 << 20, Qt.TextWordWrap | Qt.TextWrapAnywhere, message.text)
+        size = (rect.width(), rect.height())
+        self._sizes[message.uid] = (key, size)
+        return size
+
+    def _height(self, message, view_width):
+        _, text_height = self._text_size(message, self._text_width(view_width))
+        return text_height + self.time_height + 2 * self.PADDING_Y + self.SPACING + 4
+
+    def _view_width(self, option):
+        return self.parent().viewport().width() if self.parent() else option.rect.width()
+
+    def sizeHint(self, option, index):
+        message = index.data(ChatMessageModel.MessageRole)
+        view_width = self._view_width(option)
+        height = self._height(message, view_width)
+        self._reported[message.uid] = height
+        return QSize(view_width, height)
+
+    def height_changed(self, index):
+        """True if a message grew past the height last handed to the view."""
+        message = index.data(ChatMessageModel.MessageRole)
+        view_width = self.parent().viewport().width() if self.parent() else 0
+        return self._reported.get(message.uid) != self._height(message, view_width)
+
+    def paint(self, painter, option, index):
+        message = index.data(ChatMessageModel.MessageRole)
+        text_width = self._text_width(self._view_width(option))
+        used_width, text_height = self._text_size(message, text_width)
+        bubble_width = max(self.MIN_BUBBLE_WIDTH, used_width + 2 * self.PADDING_X)
+        bubble_height = text_height + self.time_height + 2 * self.PADDING_Y + 4
+
+        rect = option.rect
+        x = rect.right() - bubble_width - 10 if message.is_user else rect.left() + 10
+        bubble = QRectF(x, rect.top() + self.SPACING / 2, bubble_width, bubble_height)
+
+        hovered = bool(option.state & QStyle.State_MouseOver)
+        if message.is_user:
+            color = "#2D2B55" if hovered else ThemeColors.USER_BUBBLE
         else:
-            self.setStyleSheet(f"""
-                #chatBubble {{
-                    background-color: #413C7A;
-                    border-radius: 18px;
-                    border-top-left-radius: 4px;
-                    border: none;
-                }}
-                #messageText {{
-                    color: {ThemeColors.TEXT_PRIMARY};
-                    background: transparent;
-                }}
-                #timeLabel {{
-                    color: rgba(248, 248, 242, 0.7);
-                    background: transparent;
-                }}
-            """)
-        
-    def leaveEvent(self, event):
-        # Reset to original style
-        self.update_style()
+            color = "#413C7A" if hovered else ThemeColors.ASSISTANT_BUBBLE
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        path = QPainterPath()
+        path.addRoundedRect(bubble, 18, 18)
+        # Squarer corner on the speaker's side, like the original bubbles
+        corner = QRectF(bubble.right() - 18 if message.is_user else bubble.left(), bubble.top(), 18, 18)
+        path.addRoundedRect(corner, 4, 4)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(color))
+        painter.drawPath(path.simplified())
+
+        painter.setPen(QColor(ThemeColors.TEXT_PRIMARY))
+        painter.setFont(self.font)
+        painter.drawStaticText(QPointF(bubble.left() + self.PADDING_X, bubble.top() + self.PADDING_Y),
+                               self._static_text(message, text_width))
+
+        painter.setFont(self.time_font)
+        painter.setPen(QColor(248, 248, 242, 178))
+        time_rect = QRectF(bubble.left() + self.PADDING_X, bubble.bottom() - self.PADDING_Y - self.time_height,
+                           bubble.width() - 2 * self.PADDING_X, self.time_height)
+        painter.drawText(time_rect, Qt.AlignRight, time.strftime("%H:%M", time.localtime(message.timestamp)))
+        painter.restore()
+
+
+class TranscriptView(QListView):
+    """Chat transcript; only the visible rows are laid out and painted."""
+    reached_top = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setItemDelegate(ChatBubbleDelegate(self))
+        self.verticalScrollBar().valueChanged.connect(self._check_top)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setResizeMode(QListView.Adjust)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(200)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setMouseTracking(True)
+        self.setFrameShape(QFrame.NoFrame)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setStyleSheet(f"""
+            QListView {{
+                background-color: {ThemeColors.PRIMARY};
+                border: none;
+                outline: none;
+            }}
+            QListView::item, QListView::item:selected, QListView::item:hover {{
+                background: transparent;
+            }}
+        """)
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_context_menu)
+        QShortcut(QKeySequence.Copy, self, activated=self.copy_selected)
+
+    def dataChanged(self, top_left, bottom_right, roles=()):
+        super().dataChanged(top_left, bottom_right, roles)
+        # Relayout only when a streamed message actually needs more room
+        delegate = self.itemDelegate()
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            index = self.model().index(row, 0)
+            if delegate.height_changed(index):
+                delegate.sizeHintChanged.emit(index)
+
+    def _check_top(self, value):
+        if value == self.verticalScrollBar().minimum() and self.model() and self.model().rowCount():
+            self.reached_top.emit()
+
+    def wheelEvent(self, event):
+        # Scrolling up with nothing left above (e.g. a short transcript) also asks for more
+        if event.angleDelta().y() > 0 and self.verticalScrollBar().value() == self.verticalScrollBar().minimum():
+            self.reached_top.emit()
+        super().wheelEvent(event)
+
+    def prepend_messages(self, messages):
+        """Inserts older messages above without moving what the user is looking at."""
+        anchor = self.indexAt(self.viewport().rect().topLeft())
+        anchor_row = anchor.row() if anchor.isValid() else 0
+        offset = self.visualRect(anchor).top() if anchor.isValid() else 0
+        self.model().prepend_messages(messages)
+        self.scrollTo(self.model().index(anchor_row + len(messages)), QAbstractItemView.PositionAtTop)
+        self.verticalScrollBar().setValue(self.verticalScrollBar().value() - offset)
+
+    def copy_selected(self):
+        index = self.currentIndex()
+        if index.isValid():
+            QGuiApplication.clipboard().setText(index.data(Qt.DisplayRole))
+
+    def show_context_menu(self, pos):
+        index = self.indexAt(pos)
+        if not index.isValid():
+            return
+        self.setCurrentIndex(index)
+        menu = QMenu(self)
+        menu.addAction("Copy message", self.copy_selected)
+        menu.exec(self.viewport().mapToGlobal(pos))
 
 class RoundedButton(QPushButton):
     def __init__(self, text="", icon=None, color=ThemeColors.ACCENT, parent=None):
@@ -835,6 +3804,28 @@ class FileListWidget(QWidget):
         self.title_label.setObjectName("fileTitle")
         self.title_label.setStyleSheet(f"#fileTitle {{ font-weight: bold; font-size: 16px; color: {ThemeColors.TEXT_PRIMARY}; background: transparent; }}")
         layout.addWidget(self.title_label)
+
+        # Content search box; results replace the file list while it has text
+        self.search_box = QLineEdit()
+        self.search_box.setObjectName("fileSearch")
+        self.search_box.setPlaceholderText("Search file contents...")
+        self.search_box.addAction(QIcon(os.path.join("anton_icons", "search.png")), QLineEdit.LeadingPosition)
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.setStyleSheet(f"""
+            #fileSearch {{
+                border: 1px solid {ThemeColors.ACCENT};
+                border-radius: 10px;
+                padding: 6px;
+                background-color: {ThemeColors.SECONDARY};
+                color: {ThemeColors.TEXT_PRIMARY};
+            }}
+        """)
+        layout.addWidget(self.search_box)
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(200)
+        self._search_timer.timeout.connect(self.run_search)
+        self.search_box.textChanged.connect(self._search_timer.start)
         
         # File list
         self.list_widget = QListWidget()
@@ -859,7 +3850,18 @@ class FileListWidget(QWidget):
                 color: {ThemeColors.TEXT_PRIMARY};
             }}
         """)
+        self.list_widget.setUniformItemSizes(True)
         layout.addWidget(self.list_widget)
+
+        # Ranked search hits with snippets
+        self.results_widget = QListWidget()
+        self.results_widget.setObjectName("fileList")
+        self.results_widget.setStyleSheet(self.list_widget.styleSheet())
+        self.results_widget.setWordWrap(True)
+        self.results_widget.setVisible(False)
+        layout.addWidget(self.results_widget)
+        # Sorted filenames, parallel to the rows of list_widget
+        self._names = []
         
         # Button layout
         btn_layout = QHBoxLayout()
@@ -876,23 +3878,55 @@ class FileListWidget(QWidget):
         
         layout.addLayout(btn_layout)
         
-        # Initial file loading
-        self.refresh_files()
-        
         # Connect signals
         self.list_widget.itemDoubleClicked.connect(self.open_selected_file)
+        self.results_widget.itemDoubleClicked.connect(self.open_selected_file)
+        anton_catalogue.changed.connect(self.apply_changes)
         
     def refresh_files(self):
-        self.list_widget.clear()
-        files = os.listdir(FILES_DIR)
-        for filename in files:
-            file_path = os.path.join(FILES_DIR, filename)
-            size = os.path.getsize(file_path)
-            size_str = f"{size} bytes"
-            item = QListWidgetItem(f"{filename} ({size_str})")
-            item.setData(Qt.UserRole, filename)
-            self.list_widget.addItem(item)
+        """Picks up changes the watcher has flagged; does nothing when the folder is unchanged."""
+        anton_catalogue.refresh()
+
+    @staticmethod
+    def make_item(filename, size):
+        item = QListWidgetItem(f"{filename} ({size} bytes)")
+        item.setData(Qt.UserRole, filename)
+        return item
+
+    def apply_changes(self, updated, removed):
+        """Applies a catalogue diff row by row instead of rebuilding the list."""
+        self.list_widget.setUpdatesEnabled(False)
+        for filename in removed:
+            row = bisect.bisect_left(self._names, filename)
+            if row < len(self._names) and self._names[row] == filename:
+                del self._names[row]
+                self.list_widget.takeItem(row)
+        for filename, size, _ in updated:
+            row = bisect.bisect_left(self._names, filename)
+            if row < len(self._names) and self._names[row] == filename:
+                self.list_widget.item(row).setText(f"{filename} ({size} bytes)")
+            else:
+                self._names.insert(row, filename)
+                self.list_widget.insertItem(row, self.make_item(filename, size))
+        self.list_widget.setUpdatesEnabled(True)
             
+    def run_search(self):
+        terms = self.search_box.text().strip()
+        searching = bool(terms)
+        self.list_widget.setVisible(not searching)
+        self.results_widget.setVisible(searching)
+        self.results_widget.clear()
+        if not searching:
+            return
+        hits = anton_file_index.search(terms, limit=50)
+        if not hits:
+            self.results_widget.addItem(QListWidgetItem("No matches"))
+            return
+        for filename, snippet in hits:
+            item = QListWidgetItem(f"{filename}\n{' '.join(snippet.split())}")
+            item.setData(Qt.UserRole, filename)
+            self.results_widget.addItem(item)
+
     def create_new_file(self):
         filename, ok = QFileDialog.getSaveFileName(self, "Create New File", 
                                                  FILES_DIR, 
@@ -900,15 +3934,15 @@ class FileListWidget(QWidget):
         if ok and filename:
             base_name = os.path.basename(filename)
             create_file(base_name, "")
-            self.refresh_files()
             
     def open_selected_file(self, item):
         filename = item.data(Qt.UserRole)
-        self.fileSelected.emit(filename)
+        if filename:
+            self.fileSelected.emit(filename)
 
 # Main Application Window
 class AntonApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, startup_loader=None):
         super().__init__()
         self.setWindowTitle("Anton AI Assistant")
         self.setMinimumSize(1000, 700)
@@ -985,28 +4019,10 @@ class AntonApp(QMainWindow):
         content_layout.addWidget(chat_title)
         
         # Chat display area - set to expand and take available space
-        self.chat_area = QScrollArea()
-        self.chat_area.setWidgetResizable(True)
-        self.chat_area.setFrameShape(QFrame.NoFrame)
-        self.chat_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.chat_area.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)  # Make it expand
-        self.chat_area.setStyleSheet(f"""
-            QScrollArea {{
-                background-color: {ThemeColors.PRIMARY};
-                border: none;
-            }}
-        """)
-        
-        self.chat_widget = QWidget()
-        self.chat_widget.setObjectName("chatWidget")
-        self.chat_widget.setStyleSheet(f"#chatWidget {{ background-color: {ThemeColors.PRIMARY}; }}")
-        self.chat_layout = QVBoxLayout(self.chat_widget)
-        self.chat_layout.setAlignment(Qt.AlignTop)
-        self.chat_layout.setSpacing(20)
-        self.chat_layout.setContentsMargins(10, 10, 10, 20)  # Added more bottom margin
-        
-        self.chat_area.setWidget(self.chat_widget)
-        content_layout.addWidget(self.chat_area, 1)  # Set stretch factor to 1 to take available space
+        self.chat_model = ChatMessageModel(self)
+        self.chat_view = TranscriptView()
+        self.chat_view.setModel(self.chat_model)
+        content_layout.addWidget(self.chat_view, 1)  # Set stretch factor to 1 to take available space
         
         # Add a spacer line to separate chat and input
         separator = QFrame()
@@ -1092,19 +4108,60 @@ class AntonApp(QMainWindow):
         content_layout.addWidget(input_widget)
         main_layout.addWidget(content_widget, 1)
         
-        # Setup speech recognition thread
-        self.speech_thread = None
-        
-        # Setup opacity animation for new messages
-        self.opacity_animation = None
+        # Persistent audio worker; the microphone stays open so listening starts instantly
+        self.audio_worker = AudioWorker()
+        self.audio_worker.result.connect(self.handle_speech_result)
+        self.audio_worker.partial.connect(self.input_field.setText)
+        self.audio_worker.listening_status.connect(self.update_listening_status)
+        self.voice_indicator.clicked.connect(self.start_voice_input)
+
+        # Text-to-speech runs on its own thread; Esc stops Anton mid-sentence
+        self.tts = TTSWorker()
+        self.tts.speaking.connect(self.update_speaking_status)
+
+        # Workers load their own resources; the splash screen tracks them through the loader
+        if startup_loader:
+            self.audio_worker.ready.connect(lambda ok: startup_loader.task_done("vosk", ok))
+            self.tts.ready.connect(lambda ok: startup_loader.task_done("tts", ok))
+            startup_loader.task_finished.connect(self.handle_startup_task)
+        else:
+            self.file_list_widget.refresh_files()
+            anton_catalogue.watch()
+        self.audio_worker.start()
+        self.tts.start()
+        self.tts.prewarm(fixed_phrases())
+        QShortcut(QKeySequence(Qt.Key_Escape), self, activated=self.stop_anton)
+
+        # Messages are answered on a bounded pool and delivered in the order they were sent
+        self.scheduler = RequestScheduler(parent=self)
+        self.scheduler.started.connect(self.begin_response)
+        self.scheduler.progress.connect(self.update_progress)
+        self.scheduler.chunk.connect(self.handle_response_chunk)
+        self.scheduler.result.connect(self.handle_response)
+        self.scheduler.cancelled.connect(self.handle_cancelled)
+        self.scheduler.dropped.connect(self.handle_dropped)
+        self.scheduler.finished.connect(self.handle_request_finished)
+
+        # Streaming response state for the request currently being delivered
+        self.live_request = None
+        self.live_row = None
+        self.sentence_buffer = SentenceBuffer()
+        # Chat row of each message still waiting for an answer
+        self.request_rows = {}
         
         # Setup progress animation
         self.progress_animation = QPropertyAnimation(self.progress_bar, b"value")
         self.progress_animation.setDuration(300)
         self.progress_animation.setEasingCurve(QEasingCurve.OutQuad)
         
+        # Restore the most recent conversation; older messages load when scrolling up
+        self.history = ConversationStore()
+        restored, self.history_offset = self.history.tail(HistoryRestoreCount)
+        self.chat_model.extend_messages([ConversationStore.to_message(r) for r in restored])
+        self.chat_view.reached_top.connect(self.load_older_history)
+
         # Add a welcome message
-        self.add_message("Hello! I'm Anton, your AI assistant. How can I help you today?", is_user=False)
+        self.add_message(WELCOME_MESSAGE, is_user=False, persist=False)
         
         # Apply global styles
         self.apply_global_styles()
@@ -1144,46 +4201,28 @@ class AntonApp(QMainWindow):
             }}
         """)
         
-    def add_message(self, message, is_user=True):
-        """Add a message to the chat area"""
-        message_widget = ChatBubble(message, is_user)
-        
-        # Add alignment container
-        container = QWidget()
-        container_layout = QHBoxLayout(container)
-        container_layout.setContentsMargins(0, 0, 0, 0)
-        
-        if is_user:
-            container_layout.addStretch()
-            container_layout.addWidget(message_widget)
-        else:
-            container_layout.addWidget(message_widget)
-            container_layout.addStretch()
-            
-        # Add fade-in animation
-        opacity_effect = QGraphicsOpacityEffect(message_widget)
-        message_widget.setGraphicsEffect(opacity_effect)
-        opacity_effect.setOpacity(0)
-        
-        self.chat_layout.addWidget(container)
-        
-        self.opacity_animation = QPropertyAnimation(opacity_effect, b"opacity")
-        self.opacity_animation.setDuration(300)
-        self.opacity_animation.setStartValue(0)
-        self.opacity_animation.setEndValue(1)
-        self.opacity_animation.setEasingCurve(QEasingCurve.InOutQuad)
-        self.opacity_animation.start()
-        scroll_bar = self.chat_area.verticalScrollBar()
-        scroll_anim = QPropertyAnimation(scroll_bar, b"value")
-        scroll_anim.setDuration(500)
-        scroll_anim.setStartValue(scroll_bar.value())
-        scroll_anim.setEndValue(scroll_bar.maximum())
-        scroll_anim.setEasingCurve(QEasingCurve.OutQuint)
-        scroll_anim.start()
-        
-        # Scroll to the bottom
-        QTimer.singleShot(100, lambda: self.chat_area.verticalScrollBar().setValue(
-            self.chat_area.verticalScrollBar().maximum()))
+    def add_message(self, message, is_user=True, persist=True):
+        """Add a message to the chat area; returns its row"""
+        row = self.chat_model.append_message(message, is_user)
+        if persist:
+            self.history.append(message, is_user)
+        QTimer.singleShot(0, self.scroll_to_bottom)
+        return row
+
+    def scroll_to_bottom(self):
+        self.chat_view.scrollToBottom()
+
+    def load_older_history(self):
+        """Load the previous page of the conversation log above the transcript"""
+        if self.history_offset <= 0:
+            return
+        older, self.history_offset = self.history.read_before(self.history_offset, HistoryPageSize)
+        if not older:
+            return
+        self.chat_view.prepend_messages([ConversationStore.to_message(r) for r in older])
+        if self.live_row is not None:
+            self.live_row += len(older)
+        self.request_rows = {request_id: row + len(older) for request_id, row in self.request_rows.items()}
             
     def send_message(self):
         """Send a message to Anton"""
@@ -1192,47 +4231,98 @@ class AntonApp(QMainWindow):
             return
             
         # Add message to chat
-        self.add_message(message, is_user=True)
+        row = self.add_message(message, is_user=True)
         self.input_field.clear()
         
         # Show progress bar
         self.progress_bar.setValue(0)
         self.progress_bar.setVisible(True)
         
-        # Process the message in a thread
-        self.response_thread = ResponseThread(message)
-        self.response_thread.result.connect(self.handle_response)
-        self.response_thread.progress.connect(self.update_progress)
-        self.response_thread.start()
-        
-    def update_progress(self, value):
+        # Process the message on the scheduler's pool
+        request_id = self.scheduler.submit(message)
+        self.request_rows[request_id] = row
+
+        # A new question makes whatever Anton is saying, or has yet to say, outdated
+        self.tts.cancel(before=request_id)
+
+    def begin_response(self, request_id):
+        """The scheduler starts delivering the next request's output"""
+        self.live_request = request_id
+        self.live_row = None
+        self.sentence_buffer = SentenceBuffer()
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+
+    def stop_anton(self):
+        """Esc: stop speaking and drop every unanswered message"""
+        self.tts.cancel()
+        self.scheduler.cancel_all()
+
+    def handle_dropped(self, request_id):
+        """Mark a message the scheduler dropped from a full backlog"""
+        row = self.request_rows.get(request_id)
+        if row is not None:
+            self.chat_model.append_text(row, " [dropped]")
+
+    def handle_cancelled(self, request_id):
+        """Keep whatever part of a cancelled answer was already shown"""
+        self.request_rows.pop(request_id, None)
+        if request_id != self.live_request:
+            return
+        if self.live_row is not None:
+            self.chat_model.append_text(self.live_row, " [stopped]")
+            self.history.append(self.chat_model.message(self.live_row).text, is_user=False)
+        self.live_request = None
+        self.live_row = None
+        self.handle_request_finished(request_id)
+
+    def handle_request_finished(self, request_id):
+        """Hide the progress bar once nothing is left to answer"""
+        self.request_rows.pop(request_id, None)
+        if self.scheduler.pending_count() == 0:
+            QTimer.singleShot(500, lambda: self.progress_bar.setVisible(self.scheduler.pending_count() > 0))
+
+    def update_progress(self, request_id, value):
         """Update progress bar with animation"""
         self.progress_animation.stop()
         self.progress_animation.setStartValue(self.progress_bar.value())
         self.progress_animation.setEndValue(value)
         self.progress_animation.start()
         
-    def handle_response(self, response):
+    def handle_response_chunk(self, request_id, text):
+        """Append a streamed chunk to the live message and speak finished sentences"""
+        if self.live_row is None:
+            self.live_row = self.add_message(text.lstrip(), is_user=False, persist=False)
+        else:
+            self.chat_model.append_text(self.live_row, text)
+            self.scroll_to_bottom()
+
+        for sentence in self.sentence_buffer.feed(text):
+            self.tts.say(sentence, request_id)
+
+    def handle_response(self, request_id, response):
         """Handle the response from Anton"""
+        if self.live_row is not None:
+            # Streamed: the message already holds the text, only the tail is left to speak
+            self.live_row = None
+            self.history.append(response, is_user=False)
+            for sentence in self.sentence_buffer.flush():
+                self.tts.say(sentence, request_id)
+            return
+
         # Add response to chat
         self.add_message(response, is_user=False)
         
-        # Hide progress bar after a moment
-        QTimer.singleShot(500, lambda: self.progress_bar.setVisible(False))
-        
         # Speak the response
-        QTimer.singleShot(100, lambda: speak(response))
+        self.tts.say(response, request_id)
         
     def start_voice_input(self):
-        """Start voice input"""
-        # Hide the voice button and show indicator
-        self.voice_indicator.start_waves()
-        
-        # Start speech recognition in a thread
-        self.speech_thread = SpeechRecognitionThread()
-        self.speech_thread.result.connect(self.handle_speech_result)
-        self.speech_thread.listening_status.connect(self.update_listening_status)
-        self.speech_thread.start()
+        """Start voice input, or finish the current utterance if already listening"""
+        if self.audio_worker.is_listening():
+            self.audio_worker.stop_listening()
+        else:
+            self.tts.cancel()
+            self.audio_worker.start_listening()
         
     def handle_speech_result(self, text):
         """Handle speech recognition result"""
@@ -1245,17 +4335,106 @@ class AntonApp(QMainWindow):
     def update_listening_status(self, is_listening):
         """Update the UI listening status"""
         self.voice_stack.setCurrentIndex(1 if is_listening else 0)
-        if not is_listening:
+        if is_listening:
+            self.voice_indicator.start_waves()
+        else:
             self.voice_indicator.stop_waves()
             self.voice_indicator.stop_waves()
             self.voice_indicator.setVisible(False)
             self.voice_button.setVisible(True)
     
+    def handle_startup_task(self, name, ok):
+        if name == "files":
+            # The startup scan has already reached the list through anton_catalogue.changed
+            if not ok:
+                self.file_list_widget.refresh_files()
+            anton_catalogue.watch()
+
+    def update_speaking_status(self, is_speaking):
+        """Show that Anton is talking and how to interrupt"""
+        self.input_field.setPlaceholderText(
+            "Anton is speaking... (Esc to stop)" if is_speaking else "Ask Anton something...")
+
     def handle_file_selection(self, filename):
         result = open_file(filename)
         self.add_message(f"File opened: {filename}", is_user=True)
         self.add_message(result, is_user=False)
 
+    def closeEvent(self, event):
+        self.scheduler.shutdown()
+        print(self.scheduler.report())
+        self.audio_worker.stop()
+        self.tts.stop()
+        super().closeEvent(event)
+
+# Startup
+# Tasks the main window waits for; everything else keeps loading after it appears
+CRITICAL_STARTUP_TASKS = ("gemini",)
+STARTUP_TIMEOUT_MS = 10000
+
+class StartupLoader(QObject):
+    """
+    Runs startup tasks in parallel and reports real progress. Subsystem tasks run here
+    on background threads; workers that load their own resources (TTS, Vosk) report
+    through task_done(), which is safe to call from any thread.
+    """
+    progress = Signal(int, str)
+    task_finished = Signal(str, bool)
+    critical_ready = Signal()
+    all_ready = Signal()
+    _finished = Signal(str, bool)
+
+    def __init__(self, critical=CRITICAL_STARTUP_TASKS, parent=None):
+        super().__init__(parent)
+        self.critical = set(critical)
+        self.tasks = OrderedDict()
+        self.done = {}
+        self._background = []
+        self._critical_emitted = False
+        self._finished.connect(self._on_task_done)
+
+    def add_task(self, name, label, background=True):
+        """Registers a task; background tasks are anton_subsystems names run by start()."""
+        self.tasks[name] = label
+        if background:
+            self._background.append(name)
+
+    def start(self, timeout_ms=STARTUP_TIMEOUT_MS):
+        self.progress.emit(0, self._pending_label())
+        anton_subsystems.warm_up(self._background, on_task_done=self.task_done)
+        QTimer.singleShot(timeout_ms, self.force_ready)
+        self._check()
+
+    def task_done(self, name, ok=True):
+        self._finished.emit(name, ok)
+
+    def _pending_label(self):
+        pending = [label for name, label in self.tasks.items() if name not in self.done]
+        return pending[0] if pending else "Ready"
+
+    def _on_task_done(self, name, ok):
+        if name not in self.tasks or name in self.done:
+            return
+        self.done[name] = ok
+        self.task_finished.emit(name, ok)
+        self.progress.emit(int(100 * len(self.done) / len(self.tasks)), self._pending_label())
+        self._check()
+
+    def _check(self):
+        if not self._critical_emitted and self.critical <= set(self.done):
+            self._critical_emitted = True
+            self.critical_ready.emit()
+        if len(self.done) == len(self.tasks):
+            self.all_ready.emit()
+
+    def force_ready(self):
+        """Shows the window anyway if a critical task hangs."""
+        if not self._critical_emitted:
+            waiting = ", ".join(sorted(self.critical - set(self.done)))
+            print(f"Startup still waiting on {waiting}; continuing in the background")
+            self._critical_emitted = True
+            self.critical_ready.emit()
+
 # Add a splash screen for additional animation
 class SplashScreen(QWidget):
     def __init__(self):
@@ -1317,29 +4496,23 @@ class SplashScreen(QWidget):
         self.loading_text.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.loading_text)
         
-        # Animation
+        # Animation between real progress steps
         self.loading_animation = QPropertyAnimation(self.progress, b"value")
-        self.loading_animation.setDuration(2500)
-        self.loading_animation.setStartValue(0)
-        self.loading_animation.setEndValue(100)
-        self.loading_animation.setEasingCurve(QEasingCurve.OutInQuint)
-        self.loading_animation.finished.connect(self.close)
-        
-        # Loading text animation
-        self.loading_texts = ["Loading resources...", "Initializing AI models...", "Almost ready...", "Preparing your experience..."]
-        self.text_timer = QTimer(self)
-        self.text_timer.timeout.connect(self.update_loading_text)
-        self.text_timer.start(700)
-        
-        # Start the animation
-        self.loading_animation.start()
+        self.loading_animation.setDuration(200)
+        self.loading_animation.setEasingCurve(QEasingCurve.OutQuad)
         
-    def update_loading_text(self):
-        """Update the loading text"""
-        current_text = self.loading_text.text()
-        index = self.loading_texts.index(current_text) if current_text in self.loading_texts else -1
-        next_index = (index + 1) % len(self.loading_texts)
-        self.loading_text.setText(self.loading_texts[next_index])
+    def track(self, loader):
+        """Follow a StartupLoader's progress"""
+        loader.progress.connect(self.set_progress)
+        loader.critical_ready.connect(self.close)
+
+    def set_progress(self, value, text):
+        """Animate the bar to the given value and show what is loading"""
+        self.loading_animation.stop()
+        self.loading_animation.setStartValue(self.progress.value())
+        self.loading_animation.setEndValue(value)
+        self.loading_animation.start()
+        self.loading_text.setText(text)
         
     def paintEvent(self, event):
         """Paint the background with rounded corners and blur effect"""
@@ -1360,6 +4533,20 @@ class SplashScreen(QWidget):
         painter.setPen(QPen(QColor(ThemeColors.ACCENT), 2))
         painter.drawRoundedRect(1, 1, self.width()-2, self.height()-2, 20, 20)
 
+def print_usage_report():
+    """Prints router and model usage collected during the session."""
+    print(anton_router.report())
+    print(anton_models.report())
+    print(anton_limits.report())
+    print(anton_response_cache.report())
+    print(anton_summary_cache.report())
+    print(anton_context.report())
+    print(anton_search.report())
+    print(anton_catalogue.report())
+    print(anton_file_index.report())
+    print(anton_versions.report())
+    print(anton_subsystems.report())
+
 def main():
     try:
         app = QApplication(sys.argv)
@@ -1369,14 +4556,7 @@ def main():
         app.setFont(font)
         
         print("Starting Anton app...")
-        
-        try:
-            # Test model initialization
-            test_model = genai.GenerativeModel('gemini-2.0-flash-thinking-exp')
-            print("Model initialized successfully")
-        except Exception as model_error:
-            print(f"Error initializing Gemini model: {model_error}")
-            # Fallback to simpler model configuration if needed
+        app.aboutToQuit.connect(print_usage_report)
         
         # Show splash screen
         try:
@@ -1384,12 +4564,29 @@ def main():
             splash.show()
             print("Splash screen created")
             
+            # Initialisation tasks run in parallel while the splash is up
+            loader = StartupLoader()
+            loader.add_task("gemini", "Initializing AI models...")
+            loader.add_task("search", "Connecting web search...")
+            loader.add_task("files", "Indexing your files...")
+            loader.add_task("tts", "Warming up voice...", background=False)
+            loader.add_task("vosk", "Loading speech model...", background=False)
+            splash.track(loader)
+
             # Create main window
-            main_window = AntonApp()
+            started = time.perf_counter()
+            main_window = AntonApp(startup_loader=loader)
+            anton_subsystems.record("main window", time.perf_counter() - started)
             print("Main window created")
+
+            def show_main_window():
+                main_window.show()
+                anton_subsystems.record("window visible (since launch)", time.perf_counter() - PROCESS_START)
             
-            # When splash screen closes, show main window
-            splash.loading_animation.finished.connect(lambda: main_window.show())
+            # Show the main window as soon as the critical tasks are done
+            loader.critical_ready.connect(show_main_window)
+            loader.all_ready.connect(lambda: print(anton_subsystems.report()))
+            loader.start()
             
             sys.exit(app.exec())
         except Exception as ui_error:
@@ -0,0 +1,382 @@
+"""
+Performance benchmarks for Anton.
+
+Usage:
+    python benchmark.py transcript [--messages 10000]
+    python benchmark.py diff [--lines 20000]
+    python benchmark.py replay [--corpus queries.txt] [--via thread]
+    python benchmark.py writes [--size-mb 300]
+
+Qt benchmarks run on the offscreen platform unless QT_QPA_PLATFORM is set.
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+SAMPLE_SENTENCES = [
+    "Sure, here is a quick overview.",
+    "The capital of France is Paris, which is also its largest city.",
+    "Photosynthesis turns light, water and carbon dioxide into glucose and oxygen.",
+    "You can convert kilometres to miles by multiplying by 0.621.",
+    "Let me know if you want more detail on any of these points!",
+]
+
+
+def sample_text(i, rng):
+    return " ".join(rng.choice(SAMPLE_SENTENCES) for _ in range(1 + i % 6))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def covered_seconds(intervals):
+    """Length of the union of (start, end) intervals, so overlapping waits count once."""
+    total, reach = 0.0, float("-inf")
+    for start, end in sorted(intervals):
+        if end > reach:
+            total += end - max(start, reach)
+            reach = end
+    return total
+
+
+def bench_transcript(args):
+    from PySide6.QtWidgets import QApplication
+    qt_app = QApplication.instance() or QApplication(sys.argv)
+    import app as anton
+
+    rng = random.Random(42)
+    view = anton.TranscriptView()
+    model = anton.ChatMessageModel()
+    view.setModel(model)
+    view.resize(900, 700)
+    view.show()
+    qt_app.processEvents()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    model.extend_messages([
+        anton.ChatMessage(sample_text(i, rng), is_user=i % 2 == 0) for i in range(args.messages)
+    ])
+    view.scrollToBottom()
+    view.viewport().repaint()
+    qt_app.processEvents()
+    load_seconds = time.perf_counter() - started
+    python_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    frame_times = []
+    for _ in range(args.scrolls):
+        started = time.perf_counter()
+        view.scrollTo(model.index(rng.randrange(args.messages)))
+        view.viewport().repaint()
+        frame_times.append(time.perf_counter() - started)
+
+    append_times = []
+    for i in range(args.appends):
+        started = time.perf_counter()
+        model.append_message(sample_text(i, rng), is_user=i % 2 == 0)
+        view.scrollToBottom()
+        view.viewport().repaint()
+        qt_app.processEvents()
+        append_times.append(time.perf_counter() - started)
+
+    print(f"Transcript benchmark ({args.messages} messages)")
+    print(f"  load + first paint   {load_seconds * 1000:9.1f} ms")
+    print(f"  python memory        {python_memory / 1024 / 1024:9.1f} MiB")
+    print(f"  random scroll frame  p50 {percentile(frame_times, 50) * 1000:6.2f} ms  "
+          f"p95 {percentile(frame_times, 95) * 1000:6.2f} ms")
+    print(f"  append new message   p50 {percentile(append_times, 50) * 1000:6.2f} ms  "
+          f"p95 {percentile(append_times, 95) * 1000:6.2f} ms  mean {statistics.mean(append_times) * 1000:6.2f} ms")
+
+
+def make_document(lines, rng):
+    return "\n".join(f"{i}: {rng.choice(SAMPLE_SENTENCES)}" for i in range(lines)) + "\n"
+
+
+def edit_document(text, every, rng):
+    """Rewrites every n-th line of a document."""
+    lines = text.splitlines()
+    for i in range(rng.randrange(every), len(lines), every):
+        lines[i] = lines[i].replace(" ", " really ", 1)
+    return "\n".join(lines) + "\n"
+
+
+def bench_diff(args):
+    import app as anton
+
+    rng = random.Random(7)
+    old_text = make_document(args.lines, rng)
+    edits = [
+        ("one line", edit_document(old_text, args.lines, rng)),
+        ("a few lines", edit_document(old_text, max(1, args.lines // 4), rng)),
+        ("1% of lines", edit_document(old_text, 100, rng)),
+    ]
+
+    # Modelled model latency: a fixed round trip plus prompt processing time
+    def model_seconds(tokens):
+        return (args.round_trip_ms + tokens / 1000 * args.ms_per_1k_tokens) / 1000
+
+    print(f"Update change-summary benchmark ({args.lines} lines, "
+          f"{len(old_text) / 1024 / 1024:.1f} MiB per version)")
+    print(f"  model latency modelled as {args.round_trip_ms:.0f} ms + {args.ms_per_1k_tokens:.0f} ms per 1k prompt tokens")
+    for label, new_text in edits:
+        full_prompt = (
+            f"Compare the previous and new version of this file. Describe the changes clearly:\n\n"
+            f"Previous:\n{old_text}\n\nNew:\n{new_text}\n\n"
+            f"Summarize the changes in bullet points."
+        )
+        full_prompt_tokens = anton.estimate_tokens(full_prompt)
+
+        started = time.perf_counter()
+        diff = anton.FileDiff(old_text, new_text)
+        local = diff.changed_lines <= anton.LocalDiffMaxLines
+        diff_tokens = 0 if local else anton.estimate_tokens(diff.text[:anton.SummaryChunkChars])
+        diff_seconds = time.perf_counter() - started
+
+        before = model_seconds(full_prompt_tokens)
+        after = diff_seconds + (0 if local else model_seconds(diff_tokens))
+        print(f"  {label:12} {diff.changed_lines:6d} changed lines  "
+              f"tokens {full_prompt_tokens:8d} -> {diff_tokens:6d}  "
+              f"latency {before * 1000:8.0f} ms -> {after * 1000:7.0f} ms "
+              f"(diff {diff_seconds * 1000:.0f} ms{', summarised locally' if local else ''})")
+
+
+REPLAY_CORPUS = [
+    "what is the capital of france",
+    "explain photosynthesis in simple terms",
+    "what's the weather in delhi today",
+    "latest news about electric cars",
+    "who are you",
+    "how do I convert kilometres to miles",
+    "bitcoin price right now",
+    "tell me a fun fact about octopuses",
+    "list files",
+    "create file replay_notes.txt with three tips for focus",
+    "read file replay_notes.txt",
+    "what about its history",
+]
+
+
+def load_corpus(path):
+    if not path:
+        return list(REPLAY_CORPUS)
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def replay_direct(anton, queries, concurrency):
+    def run(query):
+        started = time.perf_counter()
+        anton.Antons_Response(query)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(run, queries))
+
+
+def replay_threads(anton, queries, concurrency):
+    from PySide6.QtCore import QCoreApplication, QEventLoop
+    QCoreApplication.instance() or QCoreApplication(sys.argv)
+    pending = list(reversed(queries))
+    running = set()
+    latencies = []
+    loop = QEventLoop()
+
+    def start_next():
+        while pending and len(running) < concurrency:
+            thread = anton.ResponseThread(pending.pop())
+            started = time.perf_counter()
+            thread.result.connect(lambda _, started=started: latencies.append(time.perf_counter() - started))
+            thread.finished.connect(lambda thread=thread: finish(thread))
+            running.add(thread)
+            thread.start()
+        if not running:
+            loop.quit()
+
+    def finish(thread):
+        running.discard(thread)
+        start_next()
+
+    start_next()
+    if running:
+        loop.exec()
+    return latencies
+
+
+def bench_replay(args):
+    # Offline by default, in a scratch directory so caches and files start empty
+    os.environ["ANTON_BACKEND"] = args.backend
+    os.environ["ANTON_STUB_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["ANTON_STUB_CHUNK_MS"] = str(args.chunk_ms)
+    corpus = load_corpus(args.corpus)
+    root = os.path.dirname(os.path.abspath(__file__))
+    workdir = tempfile.mkdtemp(prefix="anton-replay-")
+    classifier = os.path.join(root, "models", "router_classifier.json")
+    if os.path.exists(classifier):
+        os.makedirs(os.path.join(workdir, "models"))
+        shutil.copy(classifier, os.path.join(workdir, "models"))
+    os.chdir(workdir)
+    # Seeded so "read file" finds the file even if it overtakes "create file" at concurrency > 1
+    os.makedirs("Anton_Files")
+    with open(os.path.join("Anton_Files", "replay_notes.txt"), "w", encoding="utf-8") as f:
+        f.write("Put the phone away.\nWork in 25 minute blocks.\nTake short walks.\n")
+    sys.path.insert(0, root)
+    import app as anton
+
+    # (start, end) of every model call and search backend request (the stub's simulated delay)
+    model_waits, search_waits = [], []
+    record_model = anton.anton_models._record
+    backend_search = anton.anton_search.backend.search
+
+    def timed_record(name, seconds, failed=False):
+        now = time.perf_counter()
+        model_waits.append((now - seconds, now))
+        record_model(name, seconds, failed)
+
+    def timed_search(*search_args):
+        started = time.perf_counter()
+        try:
+            return backend_search(*search_args)
+        finally:
+            search_waits.append((started, time.perf_counter()))
+    anton.anton_models._record = timed_record
+    anton.anton_search.backend.search = timed_search
+
+    queries = corpus * args.repeat
+    replay = replay_threads if args.via == "thread" else replay_direct
+    started = time.perf_counter()
+    latencies = replay(anton, queries, args.concurrency)
+    wall = time.perf_counter() - started
+    model_seconds = sum(entry["total_seconds"] for entry in anton.anton_models.stats.values())
+    model_calls = sum(entry["calls"] for entry in anton.anton_models.stats.values())
+
+    print(f"Replay benchmark: {len(queries)} queries via {args.via}, backend {args.backend}, "
+          f"concurrency {args.concurrency}")
+    print(f"  end-to-end latency   p50 {percentile(latencies, 50) * 1000:7.1f} ms  "
+          f"p95 {percentile(latencies, 95) * 1000:7.1f} ms  max {max(latencies) * 1000:7.1f} ms")
+    print(f"  throughput           {len(queries) / wall:7.2f} queries/s ({wall:.2f}s wall)")
+    print(f"  model calls          {model_calls} ({model_seconds:.2f}s in the model)")
+    print(f"  search requests      {len(search_waits)} "
+          f"({covered_seconds(search_waits):.2f}s in the search backend)")
+    if args.concurrency == 1:
+        # Speculation overlaps model calls and searches; only the time covered by neither is Anton's
+        waiting = covered_seconds(model_waits + search_waits)
+        overhead = (sum(latencies) - waiting) / len(latencies)
+        print(f"  Anton overhead       {overhead * 1000:7.1f} ms per query outside the model and search")
+    print(anton.anton_response_cache.report())
+    print(anton.anton_search.report())
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+def stream_chunks(total_chars, chunk_chars=64 * 1024):
+    """Model-like stream of text chunks adding up to total_chars."""
+    line = "Anton streamed this line of generated text into the file.\n"
+    block = (line * (chunk_chars // len(line) + 1))[:chunk_chars]
+    for start in range(0, total_chars, chunk_chars):
+        yield block[:min(chunk_chars, total_chars - start)]
+
+
+def measure(func):
+    """Runs func and returns (seconds, peak traced Python memory in bytes)."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def bench_writes(args):
+    workdir = tempfile.mkdtemp(prefix="anton-writes-")
+    root = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(workdir)
+    sys.path.insert(0, root)
+    import app as anton
+
+    size = args.size_mb * 1024 * 1024
+    append_size = args.append_mb * 1024 * 1024
+    path = anton.get_file_path("large.txt")
+    anton.atomic_write(path, stream_chunks(size))
+
+    def legacy_update():
+        with open(path, 'r', encoding='utf-8') as f:
+            old_content = f.read()
+        new_content = "".join(stream_chunks(size))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(new_content)
+        return len(old_content)
+
+    def streamed_update():
+        anton.atomic_write(path, stream_chunks(size),
+                           before_replace=lambda temp_path: anton.diff_files(path, temp_path))
+
+    def legacy_append():
+        additional_content = "".join(stream_chunks(append_size))
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write("\n" + additional_content)
+
+    def streamed_append():
+        anton.stream_append(path, stream_chunks(append_size))
+
+    print(f"Write benchmark ({args.size_mb} MiB file, {args.append_mb} MiB append)")
+    for label, func in [
+        ("update, read all + rewrite", legacy_update),
+        ("update, streamed + atomic", streamed_update),
+        ("append, buffered", legacy_append),
+        ("append, streamed", streamed_append),
+    ]:
+        seconds, peak = measure(func)
+        print(f"  {label:28} {seconds:7.2f} s   peak python memory {peak / 1024 / 1024:8.1f} MiB")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Anton performance benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    transcript = commands.add_parser("transcript", help="load and scroll a long chat transcript")
+    transcript.add_argument("--messages", type=int, default=10000)
+    transcript.add_argument("--scrolls", type=int, default=200)
+    transcript.add_argument("--appends", type=int, default=100)
+    transcript.set_defaults(func=bench_transcript)
+
+    diff = commands.add_parser("diff", help="tokens and latency of update_file change summaries")
+    diff.add_argument("--lines", type=int, default=20000)
+    diff.add_argument("--round-trip-ms", type=float, default=400)
+    diff.add_argument("--ms-per-1k-tokens", type=float, default=30)
+    diff.set_defaults(func=bench_diff)
+
+    replay = commands.add_parser("replay", help="end-to-end latency and throughput over a query corpus")
+    replay.add_argument("--corpus", help="text file with one query per line (default: built-in corpus)")
+    replay.add_argument("--via", choices=["response", "thread"], default="response",
+                        help="call Antons_Response directly or go through ResponseThread")
+    replay.add_argument("--backend", choices=["stub", "gemini"], default="stub")
+    replay.add_argument("--latency-ms", type=float, default=300)
+    replay.add_argument("--chunk-ms", type=float, default=30)
+    replay.add_argument("--concurrency", type=int, default=1)
+    replay.add_argument("--repeat", type=int, default=1)
+    replay.set_defaults(func=bench_replay)
+
+    writes = commands.add_parser("writes", help="time and memory of updating and appending to a large file")
+    writes.add_argument("--size-mb", type=int, default=300)
+    writes.add_argument("--append-mb", type=int, default=50)
+    writes.set_defaults(func=bench_writes)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()